@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import select, tuple_, lambda_stmt
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
+import base64
+import hashlib
 import os
-import platform
 from datetime import datetime
 from pydantic import BaseModel
 
-from app.db.database import get_db, create_db_dump, ensure_dumps_directory_exists
+from app.db.database import get_db, get_car_count, get_latest_found_at, create_db_dump, ensure_dumps_directory_exists
 from app.db.models import Car
-from app.scraper.enhanced_playwright_scraper import run_enhanced_playwright_scraper, process_mock_data
-from app.config import logger, settings
+from app.scraper.enhanced_playwright_scraper import process_mock_data
+from app.config import logger, settings, IN_DOCKER
 
 
 class ProxySettings(BaseModel):
@@ -33,67 +35,173 @@ class MockDataPaths(BaseModel):
 router = APIRouter()
 
 
-@router.get("/cars", response_model=List[dict])
+def encode_cursor(datetime_found: datetime, car_id: int) -> str:
+    """
+    Encode the sort key of the last row on a page into an opaque cursor
+    
+    Args:
+        datetime_found: Timestamp of the last returned car
+        car_id: ID of the last returned car
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{datetime_found.isoformat()}|{car_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: Opaque cursor string from a previous /cars response
+        
+    Returns:
+        Tuple of (datetime_found, id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        datetime_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(datetime_part), int(id_part)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+# Columns returned by GET /cars, selected directly to skip ORM instance loading
+CAR_LIST_COLUMNS = (
+    Car.id,
+    Car.url,
+    Car.title,
+    Car.price_usd,
+    Car.odometer,
+    Car.username,
+    Car.phone_number,
+    Car.image_url,
+    Car.images_count,
+    Car.car_number,
+    Car.car_vin,
+    Car.datetime_found,
+)
+
+
+def build_cars_page_query(cursor_key: Optional[Tuple[datetime, int]], limit: int):
+    """
+    Build the /cars page query as a cached lambda statement
+    
+    Lambda statements are compiled to SQL once per shape and then reused,
+    with the cursor values and limit extracted as bound parameters.
+    
+    Args:
+        cursor_key: (datetime_found, id) of the last row on the previous page, if any
+        limit: Number of rows to fetch
+        
+    Returns:
+        StatementLambdaElement ready to execute
+    """
+    stmt = lambda_stmt(
+        lambda: select(*CAR_LIST_COLUMNS).order_by(Car.datetime_found.desc(), Car.id.desc())
+    )
+    
+    if cursor_key:
+        last_datetime_found, last_id = cursor_key
+        stmt += lambda s: s.where(
+            tuple_(Car.datetime_found, Car.id) < tuple_(last_datetime_found, last_id)
+        )
+    
+    stmt += lambda s: s.limit(limit)
+    return stmt
+
+
+def build_cars_etag(latest_found_at: Optional[datetime], cursor: Optional[str], limit: int) -> str:
+    """
+    Build the ETag for a /cars page
+    
+    The table only grows during scraper runs, so the newest datetime_found
+    together with the page position identifies the page content.
+    
+    Args:
+        latest_found_at: Newest datetime_found in the table
+        cursor: Cursor of the requested page
+        limit: Page size
+        
+    Returns:
+        Quoted ETag value
+    """
+    key = f"{latest_found_at}|{cursor}|{limit}".encode()
+    return f'"{hashlib.blake2b(key, digest_size=8).hexdigest()}"'
+
+
+@router.get("/cars")
 async def get_cars(
-    page: int = Query(1, ge=1),
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
     limit: int = Query(10, ge=1, le=100),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get paginated car listings"""
-    offset = (page - 1) * limit
+    """
+    Get car listings using keyset pagination
     
-    # Get the total count
-    count_query = select(func.count()).select_from(Car)
-    count_result = await db.execute(count_query)
-    total_count = count_result.scalar()
+    Cars are ordered by (datetime_found, id) descending. Each page returns a
+    next_cursor that should be passed back to fetch the following page, and
+    a total that is cached for a short time rather than counted per request.
+    """
+    cursor_key = decode_cursor(cursor) if cursor else None
     
-    # Get the cars for the current page
-    cars_query = select(Car).order_by(Car.datetime_found.desc()).offset(offset).limit(limit)
-    cars_result = await db.execute(cars_query)
-    cars = [
-        {
-            "id": car.id,
-            "url": car.url,
-            "title": car.title,
-            "price_usd": car.price_usd,
-            "odometer": car.odometer,
-            "username": car.username,
-            "phone_number": car.phone_number,
-            "image_url": car.image_url,
-            "images_count": car.images_count,
-            "car_number": car.car_number,
-            "car_vin": car.car_vin,
-            "datetime_found": car.datetime_found
-        }
-        for car in cars_result.scalars().all()
-    ]
+    # Let clients revalidate cheaply while nothing new has been scraped
+    etag = build_cars_etag(await get_latest_found_at(db), cursor, limit)
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=cache_headers)
+    
+    # Fetch one extra row to know whether another page exists
+    cars_result = await db.execute(build_cars_page_query(cursor_key, limit + 1))
+    rows = cars_result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     
-    return cars
+    cars = [dict(row._mapping) for row in rows]
+    
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor(rows[-1].datetime_found, rows[-1].id)
+    
+    # orjson encodes datetimes natively and skips FastAPI's jsonable_encoder pass
+    return ORJSONResponse({
+        "items": cars,
+        "next_cursor": next_cursor,
+        "total": await get_car_count(db)
+    }, headers=cache_headers)
 
 
 @router.post("/scrape/start-playwright")
 async def start_enhanced_playwright_scraper_endpoint(
-    background_tasks: BackgroundTasks,
-    settings_update: Optional[ScraperSettings] = None,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    settings_update: Optional[ScraperSettings] = None
 ):
     """
     Manually start a scraping job using enhanced Playwright browser automation
     
-    Optionally update max tickets to scrape per run
+    The job is queued for the single background scrape worker; if a job is
+    already waiting, the request is rejected with 409.
+    
+    Optionally set max tickets to scrape for this job, other runs keep the configured limit
     """
     try:
-        # Update settings if provided
-        if settings_update:
-            settings.MAX_TICKETS_PER_RUN = settings_update.max_tickets
-            logger.info(f"Updated max tickets per run to: {settings.MAX_TICKETS_PER_RUN}")
+        max_tickets = settings_update.max_tickets if settings_update else settings.MAX_TICKETS_PER_RUN
         
-        # Run the enhanced Playwright scraper in the background
-        background_tasks.add_task(run_enhanced_playwright_scraper, db)
+        # Hand the job to the scrape worker started in the app lifespan
+        request.app.state.scrape_queue.put_nowait({
+            "requested_at": datetime.now().isoformat(),
+            "max_tickets": max_tickets
+        })
         return {
-            "status": "Scraping started in the background using enhanced Playwright scraper",
-            "max_tickets": settings.MAX_TICKETS_PER_RUN
+            "status": "Scraping job queued for the enhanced Playwright scraper",
+            "max_tickets": max_tickets
         }
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=409, detail="A scraping job is already queued")
     except Exception as e:
         logger.error(f"Error starting enhanced Playwright scraper: {e}")
         raise HTTPException(status_code=500, detail="Could not start enhanced Playwright scraper")
@@ -116,7 +224,7 @@ async def update_proxy_settings(proxy_settings: ProxySettings):
         settings.PROXY_PASSWORD = proxy_settings.proxy_password
         
         # Log a warning if we're likely in Docker
-        if os.environ.get("PYTHONPATH") == "/app":
+        if IN_DOCKER:
             logger.warning("Updating proxy settings in Docker environment may not be effective")
         
         return {
@@ -126,7 +234,7 @@ async def update_proxy_settings(proxy_settings: ProxySettings):
                 "use_proxies": settings.USE_PROXIES,
                 "proxy_count": len(settings.PROXY_LIST),
                 "has_credentials": bool(settings.PROXY_USERNAME and settings.PROXY_PASSWORD),
-                "in_docker": os.environ.get("PYTHONPATH") == "/app"
+                "in_docker": IN_DOCKER
             }
         }
     except Exception as e:
@@ -145,16 +253,8 @@ async def create_dump():
             logger.error(f"Failed to ensure dumps directory: {e}")
             raise HTTPException(status_code=500, detail=str(e))
         
-        # Check if running on Windows
-        is_windows = platform.system() == "Windows"
-        if is_windows:
-            # On Windows, use the async CSV dump method
-            from app.db.database import create_csv_dump
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            success = await create_csv_dump(timestamp)
-        else:
-            # On Linux/Mac, use the regular pg_dump method
-            success = create_db_dump()
+        # pg_dump runs as an async subprocess (CSV export on Windows or as a fallback)
+        success = await create_db_dump()
             
         if success:
             return {"status": "Database dump created successfully"}
@@ -165,8 +265,35 @@ async def create_dump():
         raise HTTPException(status_code=500, detail=f"Failed to create database dump: {str(e)}")
 
 
+def _list_dumps_sync(dumps_dir: str) -> List[Dict[str, Any]]:
+    """
+    Collect dump file metadata from the dumps directory
+    
+    Args:
+        dumps_dir: Directory containing the dumps
+        
+    Returns:
+        List of dump descriptions, newest first
+    """
+    entries = []
+    with os.scandir(dumps_dir) as it:
+        for entry in it:
+            if entry.name.endswith((".sql", ".zip")):
+                entries.append((entry.name, entry.stat()))
+    
+    entries.sort(key=lambda item: item[1].st_ctime, reverse=True)
+    return [
+        {
+            "filename": name,
+            "size_bytes": file_stats.st_size,
+            "created_at": datetime.fromtimestamp(file_stats.st_ctime).isoformat()
+        }
+        for name, file_stats in entries
+    ]
+
+
 @router.get("/dumps")
-def list_dumps():
+async def list_dumps():
     """List all available database dumps"""
     try:
         dumps_dir = "dumps"
@@ -174,19 +301,9 @@ def list_dumps():
         # Check if dumps directory exists
         if not os.path.exists(dumps_dir):
             return []
-            
-        dump_files = []
-        for file in os.listdir(dumps_dir):
-            if file.endswith(".sql") or file.endswith(".zip"):
-                file_path = os.path.join(dumps_dir, file)
-                file_stats = os.stat(file_path)
-                dump_files.append({
-                    "filename": file,
-                    "size_bytes": file_stats.st_size,
-                    "created_at": datetime.fromtimestamp(file_stats.st_ctime).isoformat()
-                })
-                
-        return sorted(dump_files, key=lambda x: x["created_at"], reverse=True)
+        
+        # Directory scanning is blocking I/O, keep it off the event loop
+        return await asyncio.to_thread(_list_dumps_sync, dumps_dir)
     except Exception as e:
         logger.error(f"Error listing dumps: {e}")
         raise HTTPException(status_code=500, detail="Could not list database dumps")
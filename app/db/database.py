@@ -1,82 +1,235 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
-from sqlalchemy import text, MetaData, Table
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import text, MetaData, Table, select, exists, func, lambda_stmt
+from sqlalchemy.engine import URL
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import os
+import time
+import functools
 import asyncio
-import subprocess
-import platform
+import io
 import json
 import csv
+import zipfile
 from datetime import datetime
 import sys
 import socket
 from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings, logger, DB_URL, IS_WINDOWS, PLATFORM_STR
+from app.db.models import Base, Car
+
+# Total car count is cached in-process so listing requests don't pay for a
+# full COUNT(*) scan every time
+CAR_COUNT_TTL_SECONDS = 30
+_car_count_cache = {"value": None, "expires_at": 0.0}
+
+# Newest datetime_found is cached briefly; it backs the /cars ETag
+LATEST_FOUND_TTL_SECONDS = 10
+_latest_found_cache = {"value": None, "expires_at": 0.0}
+
+# Rows fetched per round trip from the server-side cursor during CSV dumps
+CSV_DUMP_CHUNK_SIZE = 5000
+
+# Rows per INSERT statement and transaction when saving scraped cars
+CAR_INSERT_BATCH_SIZE = 500
+
+@functools.lru_cache(maxsize=1)
+def _resolve_db_host() -> str:
+    """
+    Check once per process whether the Docker service name 'db' resolves
+    
+    Returns:
+        'db' if it resolves, otherwise 'localhost'
+    """
+    try:
+        socket.gethostbyname('db')
+        logger.info("Successfully resolved hostname 'db'")
+        return 'db'
+    except socket.gaierror:
+        logger.warning("Could not resolve hostname 'db', falling back to 'localhost'")
+        return 'localhost'
 
-from app.config import settings, logger
-from app.db.models import Base
 
 # Determine if we need to modify the database connection based on environment
-def get_connection_url() -> str:
+def get_connection_url() -> URL:
     """
     Get the appropriate database connection URL based on environment
     
     Returns:
-        Modified DATABASE_URL if needed
+        DB_URL, with the host switched to localhost if needed
     """
-    db_url = settings.DATABASE_URL
+    # Check if the hostname is 'db' (Docker service name)
+    if DB_URL.host == 'db':
+        return DB_URL.set(host=_resolve_db_host())
     
-    # Extract host from connection URL
-    try:
-        db_url_parts = db_url.split('@')
-        if len(db_url_parts) > 1:
-            auth_part = db_url_parts[0]
-            conn_part = db_url_parts[1]
-            
-            # Extract hostname
-            host_part = conn_part.split(':')[0]
-            
-            # Check if the hostname is 'db' (Docker service name)
-            if host_part == 'db':
-                # Try to check if 'db' is resolvable
-                try:
-                    socket.gethostbyname('db')
-                    logger.info("Successfully resolved hostname 'db'")
-                except socket.gaierror:
-                    # If 'db' is not resolvable, replace with localhost
-                    logger.warning("Could not resolve hostname 'db', falling back to 'localhost'")
-                    db_url = db_url.replace('@db:', '@localhost:')
-    except Exception as e:
-        logger.warning(f"Error parsing DATABASE_URL: {e}, using original URL")
-    
-    return db_url
+    return DB_URL
 
 # Get the appropriate database URL
 db_url = get_connection_url()
-logger.info(f"Using database connection URL (host part): {db_url.split('@')[1] if '@' in db_url else db_url}")
+logger.info(f"Using database connection URL: {db_url.render_as_string(hide_password=True)}")
 
-# Create async engine
+# Create async engine with a persistent connection pool so requests reuse
+# warm connections instead of paying a connect + auth handshake every time
 engine = create_async_engine(
     db_url,
     echo=False,
-    poolclass=NullPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # Commits of scraped data don't need to wait for the WAL flush; a crash can
+    # lose the last few transactions but never corrupts the database
+    connect_args={"server_settings": {"synchronous_commit": settings.DB_SYNCHRONOUS_COMMIT}},
 )
 
 # Create async session factory
-async_session = sessionmaker(
+async_session = async_sessionmaker(
     engine,
-    class_=AsyncSession,
     expire_on_commit=False,
 )
 
 
 async def get_db():
     """Dependency for getting async DB session"""
+    # The context manager closes the session on exit
     async with async_session() as session:
+        yield session
+
+
+async def get_car_count(db: AsyncSession) -> int:
+    """
+    Get the total number of cars, cached for CAR_COUNT_TTL_SECONDS
+    
+    Args:
+        db: Database session used when the cached value has expired
+        
+    Returns:
+        Approximate (at most CAR_COUNT_TTL_SECONDS stale) number of cars
+    """
+    now = time.monotonic()
+    if _car_count_cache["value"] is not None and now < _car_count_cache["expires_at"]:
+        return _car_count_cache["value"]
+    
+    result = await db.execute(lambda_stmt(lambda: select(func.count()).select_from(Car)))
+    count = result.scalar()
+    
+    _car_count_cache["value"] = count
+    _car_count_cache["expires_at"] = now + CAR_COUNT_TTL_SECONDS
+    return count
+
+
+async def get_latest_found_at(db: AsyncSession) -> Optional[datetime]:
+    """
+    Get the newest datetime_found in the cars table, cached for LATEST_FOUND_TTL_SECONDS
+    
+    Args:
+        db: Database session used when the cached value has expired
+        
+    Returns:
+        Timestamp of the most recently found car, or None if the table is empty
+    """
+    now = time.monotonic()
+    if now < _latest_found_cache["expires_at"]:
+        return _latest_found_cache["value"]
+    
+    result = await db.execute(lambda_stmt(lambda: select(func.max(Car.datetime_found))))
+    latest = result.scalar()
+    
+    _latest_found_cache["value"] = latest
+    _latest_found_cache["expires_at"] = now + LATEST_FOUND_TTL_SECONDS
+    return latest
+
+
+async def insert_cars(db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert scraped cars in batches, skipping URLs that are already stored
+    
+    Each batch is a single multi-row INSERT ... ON CONFLICT (url) DO NOTHING
+    committed on its own, so a failing batch is rolled back and logged
+    without losing the others.
+    
+    Args:
+        db: Database session
+        rows: Car column values, keys that are not Car columns are ignored
+        
+    Returns:
+        Number of inserted cars
+    """
+    car_columns = set(Car.__table__.columns.keys())
+    inserted = 0
+    
+    for start in range(0, len(rows), CAR_INSERT_BATCH_SIZE):
+        batch = rows[start:start + CAR_INSERT_BATCH_SIZE]
+        # A multi-row VALUES clause needs the same keys in every row
+        keys = sorted({key for row in batch for key in row if key in car_columns})
+        values = [{key: row.get(key) for key in keys} for row in batch]
+        
         try:
-            yield session
-        finally:
-            await session.close()
+            result = await db.execute(
+                pg_insert(Car)
+                .values(values)
+                .on_conflict_do_nothing(index_elements=[Car.url])
+                .returning(Car.id)
+            )
+            inserted += len(result.all())
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Error inserting cars {start + 1}-{start + len(batch)}: {e}")
+            await db.rollback()
+    
+    return inserted
+
+
+async def copy_cars(db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+    """
+    Bulk load scraped cars with COPY, skipping URLs that are already stored
+    
+    Rows are copied into a temporary staging table and moved into cars with a
+    single INSERT ... SELECT ... ON CONFLICT (url) DO NOTHING. If the COPY path
+    fails, the rows are saved with insert_cars instead.
+    
+    Args:
+        db: Database session
+        rows: Car column values, keys that are not Car columns are ignored
+        
+    Returns:
+        Number of inserted cars
+    """
+    if not rows:
+        return 0
+    
+    car_columns = set(Car.__table__.columns.keys()) - {"id"}
+    # datetime_found is filled by an ORM default, so it is always copied and set here
+    keys = sorted({key for row in rows for key in row if key in car_columns} | {"datetime_found"})
+    records = [tuple(row.get(key) for key in keys) for row in rows]
+    column_list = ", ".join(keys)
+    select_list = ", ".join(
+        "COALESCE(datetime_found, now())" if key == "datetime_found" else key
+        for key in keys
+    )
+    
+    try:
+        conn = await db.connection()
+        await conn.execute(text(
+            f"CREATE TEMP TABLE cars_staging ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {Car.__tablename__} WITH NO DATA"
+        ))
+        raw_connection = await conn.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "cars_staging", records=records, columns=keys
+        )
+        result = await conn.execute(text(
+            f"INSERT INTO {Car.__tablename__} ({column_list}) "
+            f"SELECT DISTINCT ON (url) {select_list} FROM cars_staging "
+            f"ON CONFLICT (url) DO NOTHING"
+        ))
+        await db.commit()
+        return result.rowcount
+    except Exception as e:
+        logger.warning(f"COPY of {len(rows)} cars failed, falling back to INSERT: {e}")
+        await db.rollback()
+        return await insert_cars(db, rows)
 
 
 async def init_db():
@@ -99,7 +252,7 @@ async def check_db_connection():
         # Try to give a more helpful error message based on the error
         error_str = str(e).lower()
         if "could not translate host name" in error_str or "could not connect to server" in error_str:
-            if "db:" in settings.DATABASE_URL:
+            if DB_URL.host == "db":
                 logger.error("The hostname 'db' could not be resolved. If you're not using Docker, "
                              "try changing the host in DATABASE_URL to 'localhost'")
         
@@ -135,7 +288,7 @@ def ensure_dumps_directory_exists() -> str:
     return dumps_dir
 
 
-def create_db_dump():
+async def create_db_dump():
     """Create a database dump"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
@@ -143,24 +296,21 @@ def create_db_dump():
         # Ensure the dumps directory exists
         dumps_dir = ensure_dumps_directory_exists()
         
-        # Determine the system and choose the appropriate dump method
-        is_windows = platform.system() == "Windows"
-        
         # For Windows, use a simple CSV export instead of pg_dump
-        if is_windows:
+        if IS_WINDOWS:
             try:
-                return create_csv_dump(timestamp)
+                return await create_csv_dump(timestamp)
             except Exception as e:
                 logger.error(f"Failed to create CSV dump: {e}")
                 return False
         else:
             # For Linux/Mac, try pg_dump first
             try:
-                return create_pg_dump(timestamp)
+                return await create_pg_dump(timestamp)
             except Exception as e:
                 logger.warning(f"pg_dump failed: {e}, falling back to CSV dump")
                 try:
-                    return create_csv_dump(timestamp)
+                    return await create_csv_dump(timestamp)
                 except Exception as csv_error:
                     logger.error(f"Failed to create CSV dump: {csv_error}")
                     return False
@@ -169,32 +319,34 @@ def create_db_dump():
         return False
 
 
-def create_pg_dump(timestamp):
-    """Create a PostgreSQL dump using pg_dump"""
+async def create_pg_dump(timestamp):
+    """Create a PostgreSQL dump using pg_dump without blocking the event loop"""
     dump_file = f"dumps/autoria_dump_{timestamp}.sql"
     
     try:
-        # Parse the database URL to extract host, user, and database
-        db_url = settings.DATABASE_URL
+        # Connection details come from the resolved connection URL
+        host_args = ["-h", db_url.host or "localhost"]
+        if db_url.port:
+            host_args += ["-p", str(db_url.port)]
         
-        # Extract host from DATABASE_URL
-        try:
-            if '@' in db_url:
-                host_part = db_url.split('@')[1].split(':')[0]
-            else:
-                host_part = "localhost"
-        except Exception:
-            logger.warning("Could not extract host from DATABASE_URL, using 'localhost'")
-            host_part = "localhost"
-            
         # Create the dump using pg_dump
-        subprocess.run([
+        proc = await asyncio.create_subprocess_exec(
             "pg_dump",
-            "-h", host_part,
-            "-U", settings.POSTGRES_USER,
-            "-d", settings.POSTGRES_DB,
-            "-f", dump_file
-        ], env={**os.environ, "PGPASSWORD": settings.POSTGRES_PASSWORD}, check=True)
+            *host_args,
+            "-U", db_url.username or settings.POSTGRES_USER,
+            "-d", db_url.database or settings.POSTGRES_DB,
+            "-f", dump_file,
+            env={**os.environ, "PGPASSWORD": db_url.password or settings.POSTGRES_PASSWORD},
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        # Relay pg_dump diagnostics as they are produced
+        async for line in proc.stderr:
+            logger.warning(f"pg_dump: {line.decode(errors='replace').rstrip()}")
+        
+        returncode = await proc.wait()
+        if returncode != 0:
+            raise RuntimeError(f"pg_dump exited with code {returncode}")
         
         logger.info(f"Database dump created: {dump_file}")
         return True
@@ -203,73 +355,141 @@ def create_pg_dump(timestamp):
         raise
 
 
+async def write_csv_stream(result, columns, zf: zipfile.ZipFile, entry_name: str) -> int:
+    """
+    Write a streamed query result as a CSV entry of an open zip archive
+    
+    Rows go straight from the server-side cursor into the compressed entry,
+    so nothing is staged on disk. The entry is only created once the first
+    chunk arrives, so empty tables don't produce a CSV.
+    
+    Args:
+        result: Streaming AsyncResult from AsyncConnection.stream()
+        columns: Column names for the header row
+        zf: Zip archive opened for writing
+        entry_name: Name of the CSV entry inside the archive
+        
+    Returns:
+        Number of data rows written
+    """
+    row_count = 0
+    f = None
+    writer = None
+    
+    try:
+        async for partition in result.partitions(CSV_DUMP_CHUNK_SIZE):
+            if f is None:
+                f = io.TextIOWrapper(
+                    zf.open(entry_name, 'w', force_zip64=True),
+                    encoding='utf-8',
+                    newline=''
+                )
+                writer = csv.writer(f)
+                writer.writerow(columns)  # Write header
+            
+            # Compression is CPU bound, keep it off the event loop
+            await asyncio.to_thread(writer.writerows, partition)
+            row_count += len(partition)
+    finally:
+        if f is not None:
+            await asyncio.to_thread(f.close)
+    
+    return row_count
+
+
+async def copy_table_to_zip(driver_connection, table: Table, zf: zipfile.ZipFile, entry_name: str) -> int:
+    """
+    Export a table with COPY ... TO STDOUT (FORMAT csv, HEADER) into a zip entry
+    
+    PostgreSQL produces the CSV itself, so rows never pass through Python
+    one by one; asyncpg hands the raw chunks to the entry's write() in an
+    executor thread. The entry always gets a header, so callers only export
+    tables that have rows.
+    
+    Args:
+        driver_connection: Raw asyncpg connection
+        table: Table to export
+        zf: Zip archive opened for writing
+        entry_name: Name of the CSV entry inside the archive
+        
+    Returns:
+        Number of data rows exported
+    """
+    f = zf.open(entry_name, 'w', force_zip64=True)
+    try:
+        # asyncpg quotes the table, schema and column identifiers itself
+        status = await driver_connection.copy_from_table(
+            table.name,
+            schema_name=table.schema,
+            columns=[column.name for column in table.columns],
+            output=f,
+            format='csv',
+            header=True
+        )
+    finally:
+        await asyncio.to_thread(f.close)
+    
+    # asyncpg returns the command tag, e.g. "COPY 1234"
+    return int(status.split()[-1])
+
+
 async def create_csv_dump(timestamp):
-    """Create a simple CSV dump of the database tables"""
+    """Create a zipped CSV dump of the database tables"""
+    zip_file = None
     try:
         # Ensure dumps root directory exists
         dumps_dir = ensure_dumps_directory_exists()
+        zip_file = f"{dumps_dir}/autoria_dump_{timestamp}.zip"
         
-        # Create directory for this specific dump
-        dump_dir = f"{dumps_dir}/dump_{timestamp}"
-        
-        if settings.CREATE_DIRS_AUTOMATICALLY:
-            os.makedirs(dump_dir, exist_ok=True)
-        elif not os.path.exists(dump_dir):
-            try:
-                os.makedirs(dump_dir)
-            except Exception as e:
-                logger.error(f"Failed to create dump directory '{dump_dir}': {e}")
-                return False
-        
-        # Create info file with timestamp and metadata
-        info_file = os.path.join(dump_dir, "info.json")
-        with open(info_file, 'w') as f:
-            json.dump({
+        with zipfile.ZipFile(zip_file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=3) as zf:
+            # Add info file with timestamp and metadata
+            zf.writestr("info.json", json.dumps({
                 "timestamp": timestamp,
                 "database": settings.POSTGRES_DB,
                 "created_at": datetime.now().isoformat(),
-                "platform": platform.platform(),
+                "platform": PLATFORM_STR,
                 "python_version": sys.version
-            }, f, indent=2)
-        
-        # Dump each table to CSV
-        async with engine.begin() as conn:
-            # First, get a list of all tables
-            result = await conn.execute(text("""
-                SELECT table_name FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """))
-            tables = [row[0] for row in result.fetchall()]
+            }, indent=2))
             
-            for table_name in tables:
-                # Get all data from the table
-                result = await conn.execute(text(f"SELECT * FROM {table_name}"))
-                rows = result.fetchall()
-                
-                if not rows:
-                    logger.info(f"Table {table_name} is empty, skipping")
-                    continue
-                
-                # Get column names
-                columns = result.keys()
+            # Dump each table to CSV
+            async with engine.begin() as conn:
+                # The schema is owned by our models, so take the table list from
+                # the metadata instead of probing information_schema
+                tables = Base.metadata.sorted_tables
                 
-                # Write to CSV
-                csv_file = os.path.join(dump_dir, f"{table_name}.csv")
-                with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(columns)  # Write header
-                    for row in rows:
-                        writer.writerow(row)
+                # COPY needs the underlying asyncpg connection
+                raw_connection = await conn.get_raw_connection()
+                driver_connection = raw_connection.driver_connection
+                use_copy = hasattr(driver_connection, "copy_from_table")
                 
-                logger.info(f"Exported {len(rows)} rows from table {table_name} to {csv_file}")
-        
-        # Create a zip file of the dump
-        zip_file = f"{dumps_dir}/autoria_dump_{timestamp}.zip"
-        import shutil
-        shutil.make_archive(zip_file.replace('.zip', ''), 'zip', dump_dir)
+                for table in tables:
+                    table_name = table.name
+                    entry_name = f"{table_name}.csv"
+                    
+                    if use_copy:
+                        # COPY writes the header even for no rows, keep empty tables out like the stream path
+                        has_rows = await conn.scalar(select(exists().select_from(table)))
+                        row_count = await copy_table_to_zip(driver_connection, table, zf, entry_name) if has_rows else 0
+                    else:
+                        # Stream the table through a server-side cursor instead of fetchall();
+                        # select() over the Table emits quoted identifiers and an explicit column list
+                        result = await conn.stream(
+                            select(table).execution_options(yield_per=CSV_DUMP_CHUNK_SIZE)
+                        )
+                        columns = list(result.keys())
+                        row_count = await write_csv_stream(result, columns, zf, entry_name)
+                    
+                    if row_count == 0:
+                        logger.info(f"Table {table_name} is empty")
+                        continue
+                    
+                    logger.info(f"Exported {row_count} rows from table {table_name} to {zip_file}")
         
         logger.info(f"Database dump created as CSV files in {zip_file}")
         return True
     except Exception as e:
         logger.error(f"Failed to create CSV dump: {e}")
-        raise 
\ No newline at end of file
+        # Don't leave a truncated archive behind
+        if zip_file and os.path.exists(zip_file):
+            os.remove(zip_file)
+        raise
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -6,6 +6,10 @@ Base = declarative_base()
 
 class Car(Base):
     __tablename__ = "cars"
+    __table_args__ = (
+        # Backs keyset pagination in GET /cars (ORDER BY datetime_found DESC, id DESC)
+        Index("ix_cars_datetime_found_id", "datetime_found", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, unique=True, index=True, nullable=False)
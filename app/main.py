@@ -1,16 +1,18 @@
 import asyncio
+import contextlib
 import uvicorn
-import threading
 import os
 import sys
-import platform
 from pathlib import Path
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
-from app.config import settings, logger
+from app.config import settings, logger, PLATFORM_STR
 from app.db.database import init_db, check_db_connection
-from app.scheduler import start_scheduler
+from app.scheduler import start_scheduler, scrape_worker, cancel_scrape_jobs
 from app.api.routes import router
+from app.scraper.parser import start_parse_pool, shutdown_parse_pool
+from app.scraper.enhanced_playwright_scraper import close_http_client
 
 
 @asynccontextmanager
@@ -22,7 +24,7 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup")
     
     # Log system information
-    logger.info(f"Platform: {platform.platform()}")
+    logger.info(f"Platform: {PLATFORM_STR}")
     logger.info(f"Python version: {sys.version}")
     logger.info(f"Current working directory: {os.getcwd()}")
     logger.info(f"Path separator: {os.path.sep}")
@@ -42,16 +44,31 @@ async def lifespan(app: FastAPI):
     else:
         logger.error("Failed to connect to database, check your settings")
     
-    # Start scheduler in a separate thread
-    scheduler_thread = threading.Thread(target=start_scheduler)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
-    logger.info("Scheduler started in background thread")
+    # Start the parse workers now rather than on the first scraped page
+    await asyncio.to_thread(start_parse_pool)
+    
+    # Start scheduler on the application's event loop
+    scheduler = start_scheduler()
+    logger.info("Scheduler started")
+    
+    # Manual scrape requests are queued and run by a single worker
+    app.state.scrape_queue = asyncio.Queue(maxsize=1)
+    scrape_worker_task = asyncio.create_task(scrape_worker(app.state.scrape_queue))
     
     yield
     
     # Shutdown
     logger.info("Application shutdown")
+    # Let a cancelled scrape close its browser pool before anything it uses is shut down
+    scrape_worker_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await scrape_worker_task
+    scheduler.shutdown(wait=False)
+    await cancel_scrape_jobs()
+    
+    # Shared scrape resources go last, once no scrape can still be using them
+    shutdown_parse_pool()
+    await close_http_client()
 
 
 # Create FastAPI application
@@ -59,6 +76,7 @@ app = FastAPI(
     title="AutoRia Scraper API",
     description="API for scraping and accessing AutoRia used car data",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -73,7 +91,7 @@ async def root():
         "status": "ok", 
         "message": "AutoRia Scraper API is running",
         "cwd": os.getcwd(),
-        "platform": platform.platform(),
+        "platform": PLATFORM_STR,
         "auto_start_scraping": settings.AUTO_START_SCRAPING,
         "create_dirs_automatically": settings.CREATE_DIRS_AUTOMATICALLY
     }
@@ -86,6 +104,8 @@ if __name__ == "__main__":
             "app.main:app",
             host="0.0.0.0",
             port=8000,
+            # Picks uvloop when it is installed (not available on Windows)
+            loop="auto",
             reload=False
         )
     except Exception as e:
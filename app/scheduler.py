@@ -1,90 +1,143 @@
 import asyncio
-import schedule
-import time
-import threading
+import contextlib
+import re
 from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Set
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 
 from app.config import settings, logger
 from app.db.database import async_session, create_db_dump
 from app.scraper.enhanced_playwright_scraper import run_enhanced_playwright_scraper
 
-# Make sure we're importing the correct schedule module 
-try:
-    schedule.every  # Test if schedule.every exists
-except AttributeError:
-    # If it doesn't exist, reimport as a different name to avoid conflicts
-    import schedule as schedule_lib
-    schedule = schedule_lib
+# Daily "HH:MM" times are still accepted alongside crontab expressions
+DAILY_TIME_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})$")
 
-def run_threaded(job_func, *args, **kwargs):
-    """Run a function in a separate thread"""
-    job_thread = threading.Thread(target=job_func, args=args, kwargs=kwargs)
-    job_thread.start()
+# Scheduled and queued scrapes share the browser pool, parse cache and HTTP client, so only one runs at a time
+scrape_lock = asyncio.Lock()
 
+# Scheduled scrapes in progress, cancelled on shutdown since the scheduler does not wait for them
+running_scrape_jobs: Set[asyncio.Task] = set()
 
-def run_async_job(coro_func, *args, **kwargs):
-    """Run an async function in a new event loop"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+
+def build_trigger(schedule_value: str) -> CronTrigger:
+    """
+    Build a cron trigger from a schedule setting
     
-    async def run_job():
-        try:
-            # Create a new session for this job
-            async with async_session() as session:
-                await coro_func(session, *args, **kwargs)
-        except Exception as e:
-            logger.error(f"Error running scheduled job {coro_func.__name__}: {e}")
-        finally:
-            loop.stop()
+    Args:
+        schedule_value: Either a crontab expression ("30 0 * * *") or a daily time ("00:30")
     
-    loop.create_task(run_job())
-    loop.run_forever()
-    loop.close()
+    Returns:
+        CronTrigger for the schedule
+    """
+    value = schedule_value.strip()
+    match = DAILY_TIME_PATTERN.match(value)
+    if match:
+        return CronTrigger(hour=int(match.group(1)), minute=int(match.group(2)))
+    return CronTrigger.from_crontab(value)
 
 
-def run_scraper_job():
+async def run_scraper_job():
     """Run the enhanced Playwright scraper job - called by the scheduler"""
     logger.info(f"Starting scheduled scrape job at {datetime.now()}")
-    # Use the enhanced Playwright scraper
-    run_threaded(run_async_job, run_enhanced_playwright_scraper)
+    task = asyncio.current_task()
+    running_scrape_jobs.add(task)
+    try:
+        async with scrape_lock, async_session() as session:
+            await run_enhanced_playwright_scraper(session)
+    except Exception as e:
+        logger.error(f"Error running scheduled job run_enhanced_playwright_scraper: {e}")
+    finally:
+        running_scrape_jobs.discard(task)
+
+
+async def cancel_scrape_jobs():
+    """Cancel scheduled scrapes in progress and wait until they have cleaned up"""
+    tasks = list(running_scrape_jobs)
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+async def scrape_worker(queue: asyncio.Queue):
+    """
+    Run queued scrape jobs one at a time
+    
+    Each job gets its own session from the pool, so jobs never depend on a
+    request-scoped session that is closed once the response is sent. Jobs
+    wait for a running scheduled scrape to finish first.
+    
+    Args:
+        queue: Queue of job specs put there by the API
+    """
+    while True:
+        job = await queue.get()
+        try:
+            logger.info(f"Starting queued scrape job requested at {job.get('requested_at')}")
+            async with scrape_lock, async_session() as session:
+                await run_enhanced_playwright_scraper(session, job.get("max_tickets"))
+        except Exception as e:
+            logger.error(f"Error running queued scrape job: {e}")
+        finally:
+            queue.task_done()
 
 
-def run_db_dump_job():
+async def run_db_dump_job():
     """Run the database dump job - called by the scheduler"""
     logger.info(f"Starting scheduled database dump job at {datetime.now()}")
-    success = create_db_dump()
+    success = await create_db_dump()
     if success:
         logger.info("Database dump completed successfully")
     else:
         logger.error("Database dump failed")
 
 
-def start_scheduler():
-    """Initialize and start the scheduler"""
+def start_scheduler() -> AsyncIOScheduler:
+    """
+    Initialize and start the scheduler on the running event loop
+    
+    Jobs run as coroutines on the application's loop and share its database
+    pool. max_instances=1 with coalesce prevents overlapping runs when a job
+    takes longer than its interval or several runs were missed.
+    
+    Returns:
+        The started scheduler, to be shut down by the caller
+    """
     logger.info(f"Starting scheduler with AUTO_START_SCRAPING={settings.AUTO_START_SCRAPING}")
     
-    try:
-        # Schedule the scraper job
-        schedule.every().day.at(settings.SCRAPE_TIME).do(run_scraper_job)
-        logger.info(f"Scheduled scraper job to run daily at {settings.SCRAPE_TIME}")
-        
-        # Schedule the database dump job
-        schedule.every().day.at(settings.DUMP_TIME).do(run_db_dump_job)
-        logger.info(f"Scheduled database dump job to run daily at {settings.DUMP_TIME}")
-        
-        # Check if we should run the scraper immediately
-        if settings.AUTO_START_SCRAPING:
-            logger.info("AUTO_START_SCRAPING is enabled, running scraper immediately")
-            run_scraper_job()
-        else:
-            logger.info("AUTO_START_SCRAPING is disabled, scraper will only run as scheduled")
-        
-        # Run the scheduler in a loop
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
-    except Exception as e:
-        logger.error(f"Error in scheduler: {e}")
-        # Do not run the scraper as fallback, respect the AUTO_START_SCRAPING setting
-        logger.info("Scheduler encountered an error, will not run scraper as fallback") 
\ No newline at end of file
+    scheduler = AsyncIOScheduler(
+        job_defaults={
+            "max_instances": 1,
+            "coalesce": True,
+            "misfire_grace_time": 300,
+        }
+    )
+    
+    # Schedule the scraper job, optionally firing once right away
+    scraper_job_options = {}
+    if settings.AUTO_START_SCRAPING:
+        logger.info("AUTO_START_SCRAPING is enabled, running scraper immediately")
+        scraper_job_options["next_run_time"] = datetime.now()
+    else:
+        logger.info("AUTO_START_SCRAPING is disabled, scraper will only run as scheduled")
+    
+    scheduler.add_job(
+        run_scraper_job,
+        build_trigger(settings.SCRAPE_TIME),
+        id="scraper",
+        **scraper_job_options
+    )
+    logger.info(f"Scheduled scraper job with schedule {settings.SCRAPE_TIME}")
+    
+    # Schedule the database dump job
+    scheduler.add_job(
+        run_db_dump_job,
+        build_trigger(settings.DUMP_TIME),
+        id="db_dump"
+    )
+    logger.info(f"Scheduled database dump job with schedule {settings.DUMP_TIME}")
+    
+    scheduler.start()
+    return scheduler
@@ -1,131 +1,459 @@
-from bs4 import BeautifulSoup
-import httpx
+import logging
+import lxml.html
+import orjson
+from lxml import etree
+from lxml.html import HtmlElement
 import asyncio
 import re
-from typing import Dict, List, Optional, Any, Tuple
-from urllib.parse import urljoin
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 import os
 
-from app.config import settings, logger
+from app.config import settings, logger, file_handler, stream_handler
 
 
-async def parse_car_listing_page(html: str) -> List[str]:
+def has_class(name: str) -> str:
+    """
+    Build an XPath predicate matching one class of an element, like the CSS ".name" selector
+    
+    Args:
+        name: Class name
+        
+    Returns:
+        XPath predicate expression
+    """
+    # The plain contains() is a cheap prefilter, the full test rules out partial matches
+    return f"(contains(@class, '{name}') and contains(concat(' ', normalize-space(@class), ' '), ' {name} '))"
+
+
+def _first(xpath: etree.XPath, node: HtmlElement) -> Optional[HtmlElement]:
+    """Return the first element matched by a compiled XPath, or None"""
+    found = xpath(node)
+    return found[0] if found else None
+
+
+# Site root that relative links on its pages resolve against
+SITE_URL = "https://auto.ria.com"
+
+
+def absolutize(url: str) -> str:
+    """
+    Make a link found on the site absolute
+    
+    Site paths starting with a single "/" are joined by concatenation,
+    only other relative forms go through urljoin.
+    
+    Args:
+        url: Absolute URL or link relative to the site root
+        
+    Returns:
+        Absolute URL
+    """
+    if url.startswith('http'):
+        return url
+    if url.startswith('/') and not url.startswith('//'):
+        return SITE_URL + url
+    return urljoin(SITE_URL, url)
+
+
+def extract_ld_json(root: HtmlElement) -> Dict[str, Any]:
+    """
+    Merge the page's JSON-LD objects into one dict
+    
+    Args:
+        root: Parsed page
+        
+    Returns:
+        Merged structured data, later objects win on key clashes; empty if there is none
+    """
+    merged = {}
+    for text in LD_JSON_TEXT_XPATH(root):
+        try:
+            data = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict):
+                merged.update(item)
+    return merged
+
+
+class ClassIndex:
+    """
+    Elements of a parsed page by class name, built in a single walk of the tree
+    
+    Class lookups at the top of the page are dict lookups instead of one XPath
+    walk of the whole tree each. Only descendants of the root are indexed,
+    like the descendant:: XPaths they replace.
+    """
+    
+    def __init__(self, root: HtmlElement):
+        self.root = root
+        self._elements: Dict[str, List[HtmlElement]] = {}
+        self._order: Dict[HtmlElement, int] = {}
+        for position, element in enumerate(root.iterdescendants(etree.Element)):
+            self._order[element] = position
+            classes = element.get('class')
+            if classes:
+                for name in classes.split():
+                    self._elements.setdefault(name, []).append(element)
+    
+    def _inside(self, element: HtmlElement, within: Tuple[str, ...]) -> bool:
+        """Whether element is nested in elements with the given classes, outermost first"""
+        needed = list(within)
+        for ancestor in element.iterancestors():
+            if not needed or ancestor is self.root:
+                break
+            if needed[-1] in (ancestor.get('class') or '').split():
+                needed.pop()
+        return not needed
+    
+    def find(self, name: str, also: Tuple[str, ...] = (), tag: Optional[str] = None,
+             within: Tuple[str, ...] = ()) -> List[HtmlElement]:
+        """
+        Find elements by class, like the CSS selector "within... tag.name.also"
+        
+        Args:
+            name: Class the elements have
+            also: Further classes the elements have
+            tag: Tag name the elements have
+            within: Classes of enclosing elements, outermost first
+            
+        Returns:
+            Matching elements in document order
+        """
+        found = []
+        for element in self._elements.get(name, ()):
+            if tag is not None and element.tag != tag:
+                continue
+            if also and not set(also).issubset(element.get('class').split()):
+                continue
+            if within and not self._inside(element, within):
+                continue
+            found.append(element)
+        return found
+    
+    def first(self, name: str, also: Tuple[str, ...] = (), tag: Optional[str] = None,
+              within: Tuple[str, ...] = ()) -> Optional[HtmlElement]:
+        """Return the first element found by find(), or None"""
+        found = self.find(name, also, tag, within)
+        return found[0] if found else None
+    
+    def earliest(self, elements: List[HtmlElement]) -> Optional[HtmlElement]:
+        """Return the element that comes first in the document, like the first match of a CSS selector list"""
+        return min(elements, key=self._order.__getitem__, default=None)
+    
+    def has_any(self, *names: str) -> bool:
+        """Whether any element has one of the classes"""
+        return any(name in self._elements for name in names)
+
+
+# Regex patterns used for every parsed car
+AUTO_LINK_PATTERN = re.compile(r'(?:href|link|url)=[\"\']?([^\"\'\s>]+auto_[^\"\']+\.html)')
+LINK_ATTR_PATTERN = re.compile(r'href=|link=|url=')
+KM_PATTERN = re.compile(r'(\d+)\s*(?:тис|тыс)\.?\s*км', re.IGNORECASE)
+SHOW_ALL_COUNT_PATTERN = re.compile(r'всі\s+(\d+)\s+фотографій', re.IGNORECASE)
+PHOTO_COUNT_PATTERN = re.compile(r'з\s+(\d+)')
+VIN_PATTERN = re.compile(r'[A-HJ-NPR-Z0-9]{17}', re.IGNORECASE)
+YEAR_PATTERN = re.compile(r'(\d{4})')
+BODY_START_PATTERN = re.compile(r'<body\b', re.IGNORECASE)
+TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# ASCII bytes deleted by bytes.translate when keeping only digits, or digits and "+"
+NON_DIGIT_BYTES = bytes(i for i in range(128) if not chr(i).isdigit())
+NON_PHONE_BYTES = NON_DIGIT_BYTES.replace(b'+', b'')
+
+
+def keep_chars(text: str, delete: bytes) -> str:
+    """
+    Filter text with a translation table instead of a regex substitution
+    
+    Args:
+        text: Text to filter
+        delete: ASCII bytes to remove, non-ASCII characters are always removed
+        
+    Returns:
+        The remaining characters
+    """
+    return text.encode('ascii', 'ignore').translate(None, delete).decode('ascii')
+
+# Classes that only listing pages have, a ticket element counts itself
+LISTING_ITEM_CLASSES = frozenset(('ticket-item', 'content-bar', 'content-ticket'))
+
+# Car elements of a listing page, one union of all known formats so the tree is walked once
+LISTING_ITEMS_XPATH = etree.XPath(" | ".join((
+    f"descendant::section[{has_class('ticket-item')}]",                                             # section.ticket-item, classic format
+    f"descendant::div[{has_class('ticket-item')}]",                                                 # div.ticket-item, alternative format
+    f"descendant::div[{has_class('content-ticket')}]",                                              # div.content-ticket, alternative format
+    f"descendant::*[{has_class('search-result')}]/descendant::*[{has_class('ticket-item')}]",       # .search-result .ticket-item, nested format
+    f"descendant::div[{has_class('app-catalog')}]/descendant::*[{has_class('app-catalog-item')}]",  # div.app-catalog .app-catalog-item, modern app format
+    f"descendant::*[{has_class('content-bar')}]",                                                   # .content-bar, container format
+    f"descendant::*[{has_class('app-catalog')}]/descendant::a[contains(@href, 'auto_')]",           # .app-catalog a[href*='auto_'], direct links
+)))
+AUTO_LINK_XPATH = etree.XPath("descendant::a[contains(@href, 'auto_')]/@href")
+DATA_LINK_XPATH = etree.XPath("descendant::*[@data-link-to-view]/@data-link-to-view")
+ADDRESS_LINK_XPATH = etree.XPath(f"descendant::a[{has_class('address')}]/@href")
+PHOTO_LINK_XPATH = etree.XPath(f"descendant::*[{has_class('ticket-photo')}]/descendant::a/@href")
+
+# Price, the listing and detail page formats are class lookups, then any USD amount
+STRONG_XPATH = etree.XPath("descendant::strong")
+USD_PRICE_XPATH = etree.XPath("descendant::*[@data-currency='USD']")
+
+# Odometer
+LISTING_ODOMETER_XPATH = etree.XPath(f"descendant::li[{has_class('item-char')}][{has_class('js-race')}]")
+LISTING_ITEM_ODOMETER_XPATH = etree.XPath(
+    f"descendant::li[{has_class('item-char')}][{has_class('js-race')}] | descendant::*[{has_class('characteristic-oil')}]"
+)
+
+# Images
+SOURCE_SRCSET_XPATH = etree.XPath("descendant::source[@srcset]")
+IMG_SRC_XPATH = etree.XPath("descendant::img[@src]")
+CAROUSEL_FIRST_IMG_XPATH = etree.XPath(f"descendant::*[{has_class('photo-620x465')}]/descendant::img")
+LD_JSON_TEXT_XPATH = etree.XPath("descendant::script[@type='application/ld+json']/text()")
+PICTURE_SOURCE_XPATH = etree.XPath("descendant::picture/descendant::source[@srcset]")
+IMAGE_CONTAINER_CLASSES = ("photo-620x465", "carousel", "gallery-order", "ticket-photo")
+THUMBNAIL_CLASSES = ("carousel-photo", "photo-620x465", "thumbnail")
+PHOTO_COUNT_XPATH = etree.XPath("descendant::*[@data-photo-count]")
+
+# Seller
+PHONE_UNMASK_XPATH = etree.XPath("descendant::*[@data-phone-unmask]")
+LISTING_USERNAME_XPATH = etree.XPath(
+    f"descendant::*[{has_class('seller_info_name')}] | descendant::*[{has_class('user-name')}]"
+    f" | descendant::*[{has_class('seller-info')}]/descendant::*[{has_class('name')}]"
+)
+
+# Phone
+DATA_VALUE_XPATH = etree.XPath("descendant::*[@data-value]")
+
+# Plate number and VIN
+POPUP_XPATH = etree.XPath(f"descendant::*[{has_class('popup')}]")
+
+# Title
+BRAND_XPATH = etree.XPath(f"descendant::*[{has_class('blue')}][{has_class('bold')}]")
+HEAD_TITLE_XPATH = etree.XPath(f"descendant::h1[{has_class('head')}] | descendant::h1[{has_class('auto-head')}]")
+OG_TITLE_XPATH = etree.XPath("descendant::meta[@property='og:title']")
+
+# Location, the last breadcrumb is the city
+LAST_BREADCRUMB = f"descendant::*[{has_class('breadcrumbs')}]/descendant::span[@itemprop='itemListElement'][not(following-sibling::*)]"
+LISTING_LOCATION_XPATH = etree.XPath(
+    f"descendant::*[{has_class('item-city')}] | descendant::*[{has_class('title-location')}] | {LAST_BREADCRUMB}"
+)
+LAST_BREADCRUMB_XPATH = etree.XPath("descendant::span[@itemprop='itemListElement'][not(following-sibling::*)]")
+
+# Next page link of the site's paginator (nav.pager a.js-next), then one union of the other known formats
+NEXT_PAGE_XPATH = etree.XPath(f"descendant::*[{has_class('pager')}]/descendant::a[{has_class('js-next')}][@href]")
+OTHER_NEXT_PAGE_XPATH = etree.XPath(" | ".join((
+    f"descendant::*[{has_class('pagination')}]/descendant::*[{has_class('next')}]/descendant::a[@href]",
+    f"descendant::*[{has_class('pager')}]/descendant::a[{has_class('next')}][@href]",
+    f"descendant::*[{has_class('pagination')}]/descendant::a[{has_class('arrow-right')}][@href]",
+    f"descendant::*[{has_class('search-result-pager')}]/descendant::a[{has_class('page-link')}][@rel='next'][@href]",
+    "descendant::a[@rel='next'][@href]",
+)))
+
+
+def _is_run_break(char: str) -> bool:
+    """Whether a character ends an attribute value run in AUTO_LINK_PATTERN"""
+    return char in "\"'>" or char.isspace()
+
+
+def find_auto_links(html: str) -> List[str]:
+    """
+    Find every auto_*.html link in raw HTML, like AUTO_LINK_PATTERN.findall
+    
+    Running the regex over the whole page tries it at every character.
+    Here "auto_" is located with str.find, and the regex only runs from the
+    attribute names in front of each hit, so pages without car links return
+    at C speed.
+    
+    Args:
+        html: Page HTML
+        
+    Returns:
+        Matched links in page order
+    """
+    links = []
+    match_end = 0
+    prev_pos = prev_run_start = 0
+    pos = html.find('auto_')
+    while pos != -1:
+        # Start of the run of value characters holding this hit, reusing the
+        # previous hit's run when there is no break in between
+        run_start = pos
+        while run_start > prev_pos and not _is_run_break(html[run_start - 1]):
+            run_start -= 1
+        if run_start == prev_pos and prev_pos and not _is_run_break(html[prev_pos - 1]):
+            run_start = prev_run_start
+        prev_pos, prev_run_start = pos, run_start
+        
+        # A match starts at an attribute name inside the run, or right before
+        # the quote that opens it; the leftmost one that matches wins
+        if pos >= match_end:
+            for attr in LINK_ATTR_PATTERN.finditer(html, max(match_end, run_start - 6), pos):
+                match = AUTO_LINK_PATTERN.match(html, attr.start())
+                if match:
+                    links.append(match.group(1))
+                    match_end = match.end()
+                    break
+        pos = html.find('auto_', pos + 1)
+    return links
+
+
+# Words that show up on CAPTCHA and anti-bot pages
+ANTI_BOT_MARKERS = ('captcha', 'robot', 'detection')
+
+
+def looks_like_anti_bot(html: str, markers: Tuple[str, ...] = ANTI_BOT_MARKERS) -> bool:
+    """
+    Check a page for anti-bot markers, lowercasing it only once
+    
+    Args:
+        html: HTML content of the page
+        markers: Lowercase words to look for
+        
+    Returns:
+        True if any marker is in the page
+    """
+    lowered = html.lower()
+    return any(marker in lowered for marker in markers)
+
+
+def parse_html(html: str) -> HtmlElement:
+    """
+    Parse a listing page once for parse_car_listing_page and get_next_page_url
+    
+    Links only live in the body; the head is mostly inline styles and scripts,
+    so it is left out of the tree.
+    
+    Args:
+        html: HTML content of the page
+        
+    Returns:
+        Root of the parsed body
+    """
+    body_start = BODY_START_PATTERN.search(html)
+    return lxml.html.document_fromstring(html[body_start.start():] if body_start else html)
+
+
+async def parse_car_listing_page(html: str, root: Optional[HtmlElement] = None) -> List[str]:
     """
     Parse a listing page and extract all car detail URLs
+    
+    Args:
+        html: HTML content of the page
+        root: The page as parsed by parse_html, parsed here if not given
+        
+    Returns:
+        Car detail URLs in page order
+    """
+    return find_listing_links(html, parse_html(html) if root is None else root)
+
+
+def find_listing_links(html: str, root: HtmlElement) -> List[str]:
+    """
+    Extract all car detail URLs from a parsed listing page
+    
+    Args:
+        html: HTML content of the page
+        root: The page as parsed by parse_html
+        
+    Returns:
+        Car detail URLs in page order
     """
-    soup = BeautifulSoup(html, "lxml")
     car_links = []
+    seen_links = set()
     
-    # Log some page structure info
-    page_title = soup.title.text if soup.title else "No title"
-    logger.info(f"Page title: {page_title}")
+    # Log some page structure info, the title is in the head left out of the tree
+    if logger.isEnabledFor(logging.DEBUG):
+        body_start = BODY_START_PATTERN.search(html)
+        title_match = TITLE_PATTERN.search(html, 0, body_start.start() if body_start else 0)
+        logger.debug("Page title: %s", title_match.group(1).strip() if title_match else "No title")
     
     # Check if the page might be a CAPTCHA challenge or anti-bot page
-    if "captcha" in html.lower() or "robot" in html.lower() or "detection" in html.lower():
+    if looks_like_anti_bot(html):
         logger.warning("Possible anti-bot protection detected on the page")
     
-    # Approach 1: Try multiple ways to find the car listings
-    selectors_to_try = [
-        "section.ticket-item",                 # Classic format
-        "div.ticket-item",                     # Alternative format
-        "div.content-ticket",                  # Alternative format
-        "div.content-bar",                     # Container format
-        ".search-result .ticket-item",         # Nested format
-        "div.app-catalog .app-catalog-item",   # Modern app format
-        ".content-bar",                        # Container only
-        ".app-catalog a[href*='auto_']"        # Direct links in modern format
-    ]
-    
-    for selector in selectors_to_try:
-        elements = soup.select(selector)
-        logger.info(f"Found {len(elements)} elements with selector '{selector}'")
-        
-        if elements:
-            for element in elements:
-                try:
-                    # Extract URL from different possible locations
-                    car_url = None
-                    
-                    # First check if the element itself is a link
-                    if element.name == 'a' and element.get('href') and 'auto_' in element.get('href'):
-                        car_url = element.get('href')
-                    else:
-                        # Try to find links inside the element
-                        # First look for direct auto_ links
-                        link_element = element.select_one('a[href*="auto_"]')
-                        if link_element:
-                            car_url = link_element.get('href')
-                        else:
-                            # Try data-link-to-view attribute
-                            data_link = element.select_one('[data-link-to-view]')
-                            if data_link:
-                                car_url = data_link.get('data-link-to-view')
-                            else:
-                                # Try address class links
-                                address_link = element.select_one('a.address')
-                                if address_link:
-                                    car_url = address_link.get('href')
-                                else:
-                                    # Try photo links
-                                    photo_link = element.select_one('.ticket-photo a')
-                                    if photo_link:
-                                        car_url = photo_link.get('href')
-                    
-                    # Process URL if found
-                    if car_url:
-                        if not car_url.startswith('http'):
-                            car_url = urljoin("https://auto.ria.com", car_url)
-                        
-                        if car_url not in car_links:
-                            car_links.append(car_url)
-                            logger.debug(f"Found car URL: {car_url}")
-                except Exception as e:
-                    logger.error(f"Error processing car element: {e}")
+    # Approach 1: Find the car listings in all known formats at once
+    elements = LISTING_ITEMS_XPATH(root)
+    logger.debug("Found %d car listing elements", len(elements))
+    
+    for element in elements:
+        try:
+            # Extract URL from different possible locations
+            car_url = None
+            
+            # First check if the element itself is a link
+            href = element.get('href')
+            if element.tag == 'a' and href and 'auto_' in href:
+                car_url = href
+            else:
+                # Try to find links inside the element: direct auto_ links,
+                # data-link-to-view attributes, address links, photo links
+                for link_xpath in (AUTO_LINK_XPATH, DATA_LINK_XPATH, ADDRESS_LINK_XPATH, PHOTO_LINK_XPATH):
+                    found = link_xpath(element)
+                    if found:
+                        car_url = found[0]
+                        break
+            
+            # Process URL if found
+            if car_url:
+                car_url = absolutize(car_url)
+                
+                if car_url not in seen_links:
+                    seen_links.add(car_url)
+                    car_links.append(car_url)
+                    logger.debug("Found car URL: %s", car_url)
+        except Exception as e:
+            logger.error(f"Error processing car element: {e}")
     
     # Approach 2: If no car links found yet, look for any auto_*.html links in the page
     if not car_links:
         logger.info("No car links found with selectors, trying regex pattern matching")
         # Use regex to find all auto_*.html links in the HTML
-        auto_links = re.findall(r'(?:href|link|url)=[\"\']?([^\"\'\s>]+auto_[^\"\']+\.html)', html)
+        auto_links = find_auto_links(html)
         for link in auto_links:
-            if not link.startswith('http'):
-                link = urljoin("https://auto.ria.com", link)
-            if link not in car_links:
+            link = absolutize(link)
+            if link not in seen_links:
+                seen_links.add(link)
                 car_links.append(link)
     
-    # Filter out duplicate links
-    car_links = list(set(car_links))
-    
     logger.info(f"Successfully extracted {len(car_links)} car links from page")
     # Log the first few links for debugging
-    if car_links:
+    if logger.isEnabledFor(logging.DEBUG):
         for i, link in enumerate(car_links[:3]):
-            logger.info(f"Link {i+1}: {link}")
+            logger.debug("Link %d: %s", i + 1, link)
     
     return car_links
 
 
-def extract_price_usd(car_soup: BeautifulSoup) -> Optional[float]:
+def extract_price_usd(root: HtmlElement, ld: Optional[Dict[str, Any]] = None, index: Optional[ClassIndex] = None) -> Optional[float]:
     """Extract price in USD"""
     try:
-        # Try different selectors for price in USD
-        price_element = None
-        
-        # Try listing page price format first
-        price_element = car_soup.select_one('.price-ticket .bold[data-currency="USD"]')
-        
-        # Try detail page price format
-        if not price_element:
-            price_element = car_soup.select_one('.price_value strong')
+        # Structured data first
+        offers = (ld or {}).get('offers')
+        if isinstance(offers, dict) and offers.get('priceCurrency') == 'USD' and offers.get('price'):
+            return float(offers['price'])
         
-        # Try generic price element with USD currency
-        if not price_element:
-            price_element = car_soup.select_one('[data-currency="USD"]')
+        # Try listing page price format first, then detail page format,
+        # then generic price element with USD currency
+        index = index or ClassIndex(root)
+        price_element = next(
+            (element for element in index.find('bold', within=('price-ticket',)) if element.get('data-currency') == 'USD'),
+            None
+        )
+        if price_element is None:
+            price_element = index.earliest([
+                strong for strong in (_first(STRONG_XPATH, value) for value in index.find('price_value')) if strong is not None
+            ])
+        if price_element is None:
+            price_element = _first(USD_PRICE_XPATH, root)
             
-        if price_element:
-            price_text = price_element.text.strip()
+        if price_element is not None:
+            price_text = price_element.text_content().strip()
             # Extract digits only
-            price_digits = re.sub(r'[^\d]', '', price_text)
+            price_digits = keep_chars(price_text, NON_DIGIT_BYTES)
             if price_digits:
                 return float(price_digits)
     except Exception as e:
@@ -133,119 +461,123 @@ def extract_price_usd(car_soup: BeautifulSoup) -> Optional[float]:
     return None
 
 
-def extract_odometer(car_soup: BeautifulSoup) -> Optional[int]:
+def extract_odometer(root: HtmlElement, ld: Optional[Dict[str, Any]] = None, index: Optional[ClassIndex] = None) -> Optional[int]:
     """Extract odometer value in km"""
     try:
+        # Structured data first
+        mileage = (ld or {}).get('mileageFromOdometer')
+        if isinstance(mileage, dict) and mileage.get('unitCode') == 'KMT' and mileage.get('value') is not None:
+            return int(mileage['value'])
+        
         # First try from listing page format (li.item-char.js-race)
-        odometer_element = car_soup.select_one('li.item-char.js-race')
-        if odometer_element:
-            odometer_text = odometer_element.text.strip()
+        odometer_element = _first(LISTING_ODOMETER_XPATH, root)
+        if odometer_element is not None:
+            odometer_text = odometer_element.text_content().strip()
             # Look for "тис. км" pattern
-            match = re.search(r'(\d+)\s*(?:тис|тыс)\.?\s*км', odometer_text, re.IGNORECASE)
+            match = KM_PATTERN.search(odometer_text)
             if match:
                 return int(match.group(1)) * 1000
         
         # Try detail page format (base-information)
-        odometer_element = car_soup.select_one('.base-information .size18')
-        if odometer_element:
+        odometer_element = (index or ClassIndex(root)).first('size18', within=('base-information',))
+        if odometer_element is not None:
             # Extract the number and check if it's in thousands
-            odometer_text = odometer_element.text.strip()
-            odometer_container = odometer_element.parent.text.strip()
+            odometer_text = odometer_element.text_content().strip()
+            odometer_container = odometer_element.getparent().text_content().strip()
             
             # Get the digits from the element
-            odometer_value = int(re.sub(r'[^\d]', '', odometer_text))
+            odometer_value = int(keep_chars(odometer_text, NON_DIGIT_BYTES))
             
             # Check if it's in thousands by looking for "тис. км" in the container text
             if 'тис' in odometer_container.lower():
                 return odometer_value * 1000
             return odometer_value
         
-        # Last resort - look for any number followed by km
-        km_texts = car_soup.find_all(string=re.compile(r'\d+\s*(?:тис|тыс)\.?\s*км', re.IGNORECASE))
-        if km_texts:
-            for text in km_texts:
-                match = re.search(r'(\d+)\s*(?:тис|тыс)\.?\s*км', text, re.IGNORECASE)
-                if match:
-                    return int(match.group(1)) * 1000
+        # Last resort - look for any number followed by km in the page text,
+        # assembled by lxml in one call
+        match = KM_PATTERN.search(root.text_content())
+        if match:
+            return int(match.group(1)) * 1000
     except Exception as e:
         logger.error(f"Error extracting odometer: {e}")
     return None
 
 
-def extract_images_info(car_soup: BeautifulSoup) -> Tuple[Optional[str], int]:
+def extract_images_info(root: HtmlElement, ld: Optional[Dict[str, Any]] = None, index: Optional[ClassIndex] = None) -> Tuple[Optional[str], int]:
     """Extract main image URL and count of images"""
     try:
+        index = index or ClassIndex(root)
+        
         # Try to get the main image URL
         image_url = None
         
         # First check for images in listing page format (ticket-photo)
-        ticket_photo = car_soup.select_one('.ticket-photo')
-        if ticket_photo:
+        ticket_photo = index.first('ticket-photo')
+        if ticket_photo is not None:
             # Try to get source srcset first (webp format) since it's usually higher quality
-            source_element = ticket_photo.select_one('source[srcset]')
-            if source_element and source_element.get('srcset'):
+            source_element = _first(SOURCE_SRCSET_XPATH, ticket_photo)
+            if source_element is not None and source_element.get('srcset'):
                 image_url = source_element.get('srcset')
             # Fallback to img src if source not found
             if not image_url:
-                img_element = ticket_photo.select_one('img[src]')
-                if img_element and img_element.get('src'):
+                img_element = _first(IMG_SRC_XPATH, ticket_photo)
+                if img_element is not None and img_element.get('src'):
                     image_url = img_element.get('src')
         
         # If not found in ticket-photo, check gallery-order carousel (detail page)
         if not image_url:
-            carousel = car_soup.select_one('.gallery-order.carousel')
-            if carousel:
+            carousel = index.first('gallery-order', also=('carousel',))
+            if carousel is not None:
                 # Find the first image in the carousel
-                first_img = carousel.select_one('.photo-620x465 img')
-                if first_img and first_img.get('src'):
+                first_img = _first(CAROUSEL_FIRST_IMG_XPATH, carousel)
+                if first_img is not None and first_img.get('src'):
                     image_url = first_img.get('src')
                 # If src not found, try to get from image in LD+JSON
-                elif not image_url:
-                    json_ld = carousel.select_one('script[type="application/ld+json"]')
-                    if json_ld:
-                        try:
-                            import json
-                            data = json.loads(json_ld.string)
-                            if data.get('image') and isinstance(data['image'], list) and len(data['image']) > 0:
-                                first_image = data['image'][0]
-                                if isinstance(first_image, dict) and first_image.get('contentUrl'):
-                                    image_url = first_image.get('contentUrl')
-                        except:
-                            pass
+                elif ld:
+                    images = ld.get('image')
+                    if images and isinstance(images, list):
+                        first_image = images[0]
+                        if isinstance(first_image, dict) and first_image.get('contentUrl'):
+                            image_url = first_image.get('contentUrl')
         
         # If not found in carousel or ticket-photo, try other sources
         if not image_url:
             # Try picture source element first (modern pages)
-            source_element = car_soup.select_one('picture source[srcset]')
-            if source_element:
+            source_element = _first(PICTURE_SOURCE_XPATH, root)
+            if source_element is not None:
                 image_url = source_element.get('srcset')
             
             # If not found, try regular img elements
             if not image_url:
-                img_element = car_soup.select_one('.photo-620x465 img[src], .carousel img[src], .gallery-order img[src], .ticket-photo img[src]')
-                if img_element:
+                img_element = index.earliest([
+                    img for img in (
+                        _first(IMG_SRC_XPATH, container)
+                        for name in IMAGE_CONTAINER_CLASSES for container in index.find(name)
+                    ) if img is not None
+                ])
+                if img_element is not None:
                     image_url = img_element.get('src')
         
         # Count images
         images_count = 0
         
         # Try to find the count in "show all X photos" text
-        show_all_element = car_soup.select_one('.show-all')
-        if show_all_element:
+        show_all_element = index.first('show-all')
+        if show_all_element is not None:
             # Look for pattern "Дивитися всі XX фотографій"
-            count_match = re.search(r'всі\s+(\d+)\s+фотографій', show_all_element.text, re.IGNORECASE)
+            count_match = SHOW_ALL_COUNT_PATTERN.search(show_all_element.text_content())
             if count_match:
                 images_count = int(count_match.group(1))
         
         # If no count found, try to count the thumbnail elements
         if images_count == 0:
-            thumbnail_elements = car_soup.select('.carousel-photo, .photo-620x465, .thumbnail')
+            thumbnail_elements = {element for name in THUMBNAIL_CLASSES for element in index.find(name)}
             images_count = len(thumbnail_elements)
             
             # If still no count, look for photo count in data attributes
             if images_count == 0:
-                photo_data = car_soup.select_one('[data-photo-count]')
-                if photo_data:
+                photo_data = _first(PHOTO_COUNT_XPATH, root)
+                if photo_data is not None:
                     try:
                         images_count = int(photo_data.get('data-photo-count', '0'))
                     except:
@@ -253,15 +585,17 @@ def extract_images_info(car_soup: BeautifulSoup) -> Tuple[Optional[str], int]:
                 
                 # Try to get count from count-photo span
                 if images_count == 0:
-                    count_element = car_soup.select_one('.count-photo .count .mhide, .count-photo .count .dhide')
-                    if count_element:
-                        count_match = re.search(r'з\s+(\d+)', count_element.text)
+                    count_element = index.earliest(
+                        index.find('mhide', within=('count-photo', 'count')) + index.find('dhide', within=('count-photo', 'count'))
+                    )
+                    if count_element is not None:
+                        count_match = PHOTO_COUNT_PATTERN.search(count_element.text_content())
                         if count_match:
                             images_count = int(count_match.group(1))
         
         # Make sure URL is absolute
-        if image_url and not image_url.startswith('http'):
-            image_url = urljoin("https://auto.ria.com", image_url)
+        if image_url:
+            image_url = absolutize(image_url)
             
         return image_url, images_count
     except Exception as e:
@@ -269,27 +603,28 @@ def extract_images_info(car_soup: BeautifulSoup) -> Tuple[Optional[str], int]:
         return None, 0
 
 
-def extract_username(car_soup: BeautifulSoup) -> Optional[str]:
+def extract_username(root: HtmlElement, index: Optional[ClassIndex] = None) -> Optional[str]:
     """Extract seller username"""
     try:
+        index = index or ClassIndex(root)
+        
         # Look for seller_info_name element (most common)
-        username_element = car_soup.select_one('.seller_info_name')
-        if username_element:
-            return username_element.text.strip()
+        username_element = index.first('seller_info_name')
+        if username_element is not None:
+            return username_element.text_content().strip()
             
         # Try alternative selectors
-        username_element = car_soup.select_one('.seller-info .name')
-        if username_element:
-            return username_element.text.strip()
+        username_element = index.first('name', within=('seller-info',))
+        if username_element is not None:
+            return username_element.text_content().strip()
             
         # Try phone unmask data
-        phone_element = car_soup.select_one('[data-phone-unmask]')
-        if phone_element:
+        phone_element = _first(PHONE_UNMASK_XPATH, root)
+        if phone_element is not None:
             unmask_data = phone_element.get('data-phone-unmask', '')
             if unmask_data:
                 try:
-                    import json
-                    data = json.loads(unmask_data)
+                    data = orjson.loads(unmask_data)
                     if 'name' in data and data['name']:
                         return data['name']
                 except:
@@ -299,31 +634,36 @@ def extract_username(car_soup: BeautifulSoup) -> Optional[str]:
     return None
 
 
-def extract_phone_number(car_soup: BeautifulSoup) -> Optional[str]:
+def extract_phone_number(root: HtmlElement, index: Optional[ClassIndex] = None) -> Optional[str]:
     """Extract phone number"""
     try:
+        index = index or ClassIndex(root)
+        
         # Try data-phone-number attribute first
-        phone_element = car_soup.select_one('.phone[data-phone-number]')
-        if phone_element:
+        phone_element = next((element for element in index.find('phone') if element.get('data-phone-number') is not None), None)
+        if phone_element is not None:
             phone = phone_element.get('data-phone-number', '')
             if phone:
                 return format_phone_number(phone)
         
         # Try data-value attribute (shown after clicking "показати")
-        phone_element = car_soup.select_one('[data-value]')
-        if phone_element:
+        phone_element = _first(DATA_VALUE_XPATH, root)
+        if phone_element is not None:
             phone = phone_element.get('data-value', '')
             if phone:
                 return format_phone_number(phone)
                 
         # Try to find phone in data-phone-number or directly in text
-        phone_element = car_soup.select_one('span.phone[data-phone-unmask]')
-        if phone_element:
+        phone_element = next(
+            (element for element in index.find('phone', tag='span') if element.get('data-phone-unmask') is not None),
+            None
+        )
+        if phone_element is not None:
             # Try to get from data-phone-number attribute
             phone = phone_element.get('data-phone-number', '')
             if not phone:
                 # Try to get from visible text
-                phone = phone_element.text.strip()
+                phone = phone_element.text_content().strip()
             
             if phone:
                 return format_phone_number(phone)
@@ -335,7 +675,7 @@ def extract_phone_number(car_soup: BeautifulSoup) -> Optional[str]:
 def format_phone_number(phone_text: str) -> str:
     """Format phone number to consistent format"""
     # Remove non-digit and + characters
-    phone_text = re.sub(r'[^\d+]', '', phone_text)
+    phone_text = keep_chars(phone_text, NON_PHONE_BYTES)
     
     # Format with +38 prefix if needed
     if phone_text and not phone_text.startswith('+'):
@@ -346,45 +686,48 @@ def format_phone_number(phone_text: str) -> str:
     return phone_text
 
 
-def extract_car_number(car_soup: BeautifulSoup) -> Optional[str]:
+def extract_car_number(root: HtmlElement, index: Optional[ClassIndex] = None) -> Optional[str]:
     """Extract car license plate number"""
     try:
         # Try to find the state-num element
-        car_number_element = car_soup.select_one('.state-num')
-        if car_number_element:
+        car_number_element = (index or ClassIndex(root)).first('state-num')
+        if car_number_element is not None:
             # Extract text without tooltip
-            tooltip = car_number_element.select_one('.popup')
-            if tooltip:
-                tooltip.decompose()
+            tooltip = _first(POPUP_XPATH, car_number_element)
+            if tooltip is not None:
+                tooltip.drop_tree()
             
-            car_number = car_number_element.text.strip()
+            car_number = car_number_element.text_content().strip()
             return car_number
     except Exception as e:
         logger.error(f"Error extracting car number: {e}")
     return None
 
 
-def extract_car_vin(car_soup: BeautifulSoup) -> Optional[str]:
+def extract_car_vin(root: HtmlElement, ld: Optional[Dict[str, Any]] = None, index: Optional[ClassIndex] = None) -> Optional[str]:
     """Extract car VIN"""
     try:
+        # Structured data first
+        vin = (ld or {}).get('vehicleIdentificationNumber')
+        if vin:
+            return vin
+        
         # Try to find the label-vin element
-        vin_element = car_soup.select_one('.label-vin')
-        if vin_element:
-            # Remove SVG element if exists
-            svg = vin_element.find('svg')
-            if svg:
-                svg.decompose()
+        vin_element = (index or ClassIndex(root)).first('label-vin')
+        if vin_element is not None:
+            # Remove SVG elements if exist, keeping the text after them
+            etree.strip_elements(vin_element, 'svg', with_tail=False)
                 
             # Remove popup element if exists
-            popup = vin_element.select_one('.popup')
-            if popup:
-                popup.decompose()
+            popup = _first(POPUP_XPATH, vin_element)
+            if popup is not None:
+                popup.drop_tree()
             
             # Extract VIN text
-            vin_text = vin_element.text.strip()
+            vin_text = vin_element.text_content().strip()
             
             # Use regex to extract 17-char VIN
-            vin_match = re.search(r'[A-HJ-NPR-Z0-9]{17}', vin_text, re.IGNORECASE)
+            vin_match = VIN_PATTERN.search(vin_text)
             if vin_match:
                 return vin_match.group(0)
                 
@@ -394,71 +737,85 @@ def extract_car_vin(car_soup: BeautifulSoup) -> Optional[str]:
     return None
 
 
-def extract_car_title(car_soup: BeautifulSoup) -> str:
+def extract_car_title(root: HtmlElement, ld: Optional[Dict[str, Any]] = None, index: Optional[ClassIndex] = None) -> str:
     """Extract car title/name"""
     try:
+        # Structured data first
+        name = (ld or {}).get('name')
+        if isinstance(name, str) and name.strip():
+            return name.strip()
+        
         # Try to extract from ticket-title first (listing page)
-        title_element = car_soup.select_one('.ticket-title')
-        if title_element:
-            brand_element = title_element.select_one('.blue.bold')
-            year_element = title_element.text
+        title_element = (index or ClassIndex(root)).first('ticket-title')
+        if title_element is not None:
+            brand_element = _first(BRAND_XPATH, title_element)
+            year_element = title_element.text_content()
             
-            if brand_element:
-                brand = brand_element.text.strip()
+            if brand_element is not None:
+                brand = brand_element.text_content().strip()
                 # Extract year as the last 4-digit number in the text
-                year_match = re.search(r'(\d{4})', year_element)
+                year_match = YEAR_PATTERN.search(year_element)
                 year = year_match.group(1) if year_match else ""
                 
                 return f"{brand} {year}".strip()
         
         # Try to find title in the head element (detail page)
-        title_element = car_soup.select_one('h1.head, h1.auto-head')
-        if title_element:
-            return title_element.text.strip()
+        title_element = _first(HEAD_TITLE_XPATH, root)
+        if title_element is not None:
+            return title_element.text_content().strip()
             
         # Try to extract from meta tags
-        meta_title = car_soup.select_one('meta[property="og:title"]')
-        if meta_title:
+        meta_title = _first(OG_TITLE_XPATH, root)
+        if meta_title is not None:
             return meta_title.get('content', 'Unknown')
     except Exception as e:
         logger.error(f"Error extracting title: {e}")
     return "Unknown"
 
 
-def parse_car_detail_page(html: str, url: str) -> Dict[str, Any]:
+def parse_car_detail_page(html: Union[str, HtmlElement], url: str) -> Dict[str, Any]:
     """
     Parse a car detail page and extract relevant information.
-    Also works with listing pages to extract available info.
+    Also works with listing pages, or a single already parsed listing
+    ticket element, to extract available info.
     """
-    soup = BeautifulSoup(html, "lxml")
+    root = lxml.html.document_fromstring(html) if isinstance(html, str) else html
     
-    # Check if this is a listing page or detail page
-    is_listing_page = bool(soup.select_one('.ticket-item, .content-bar, .content-ticket'))
-    logger.info(f"Processing {'listing' if is_listing_page else 'detail'} page: {url}")
+    # One walk of the tree indexes the classes every extractor looks up
+    index = ClassIndex(root)
+    
+    # Check if this is a listing page or detail page, a ticket element counts itself
+    is_listing_page = index.has_any(*LISTING_ITEM_CLASSES) or not LISTING_ITEM_CLASSES.isdisjoint(
+        (root.get('class') or '').split()
+    )
+    logger.debug("Processing %s page: %s", 'listing' if is_listing_page else 'detail', url)
+    
+    # Structured data describes the whole page, so it is only used for detail pages
+    ld = {} if is_listing_page else extract_ld_json(root)
     
     # Extract all fields that work for both listing and detail pages
-    title = extract_car_title(soup)
-    price_usd = extract_price_usd(soup)
-    image_url, images_count = extract_images_info(soup)
+    title = extract_car_title(root, ld, index)
+    price_usd = extract_price_usd(root, ld, index)
+    image_url, images_count = extract_images_info(root, ld, index)
     
     # For listing pages, try to extract limited information
     if is_listing_page:
         # Try to extract odometer from listing page
-        odometer_element = soup.select_one('li.item-char.js-race, .characteristic-oil')
+        odometer_element = _first(LISTING_ITEM_ODOMETER_XPATH, root)
         odometer = None
-        if odometer_element:
-            odometer_text = odometer_element.text.strip()
-            match = re.search(r'(\d+)\s*(?:тис|тыс)\.?\s*км', odometer_text, re.IGNORECASE)
+        if odometer_element is not None:
+            odometer_text = odometer_element.text_content().strip()
+            match = KM_PATTERN.search(odometer_text)
             if match:
                 odometer = int(match.group(1)) * 1000
         
         # Try to extract username from listing page
-        username_element = soup.select_one('.seller_info_name, .user-name, .seller-info .name')
-        username = username_element.text.strip() if username_element else None
+        username_element = _first(LISTING_USERNAME_XPATH, root)
+        username = username_element.text_content().strip() if username_element is not None else None
         
         # Try to extract car location from listing page
-        location_element = soup.select_one('.item-city, .title-location, .breadcrumbs span[itemprop="itemListElement"]:last-child')
-        car_location = location_element.text.strip() if location_element else None
+        location_element = _first(LISTING_LOCATION_XPATH, root)
+        car_location = location_element.text_content().strip() if location_element is not None else None
         
         # These are typically not available on listing pages
         phone_number = None
@@ -466,15 +823,18 @@ def parse_car_detail_page(html: str, url: str) -> Dict[str, Any]:
         car_vin = None
     else:
         # Extract all detailed info for detail pages
-        odometer = extract_odometer(soup)
-        username = extract_username(soup)
-        phone_number = extract_phone_number(soup)
-        car_number = extract_car_number(soup)
-        car_vin = extract_car_vin(soup)
+        odometer = extract_odometer(root, ld, index)
+        username = extract_username(root, index)
+        phone_number = extract_phone_number(root, index)
+        car_number = extract_car_number(root, index)
+        car_vin = extract_car_vin(root, ld, index)
         
         # Try to extract car location from detail page
-        location_element = soup.select_one('.breadcrumbs span[itemprop="itemListElement"]:last-child, .item_inner span.city')
-        car_location = location_element.text.strip() if location_element else None
+        location_element = index.earliest(
+            [crumb for breadcrumbs in index.find('breadcrumbs') for crumb in LAST_BREADCRUMB_XPATH(breadcrumbs)[:1]]
+            + index.find('city', tag='span', within=('item_inner',))
+        )
+        car_location = location_element.text_content().strip() if location_element is not None else None
     
     # Create car data dictionary with all available fields except location
     car_data = {
@@ -494,32 +854,176 @@ def parse_car_detail_page(html: str, url: str) -> Dict[str, Any]:
     if car_location:
         car_data["location"] = car_location
     
-    logger.info(f"Extracted car data: title={title}, price_usd={price_usd}, odometer={odometer}, vin={car_vin if not is_listing_page else 'NA'}")
+    logger.debug(
+        "Extracted car data: title=%s, price_usd=%s, odometer=%s, vin=%s",
+        title, price_usd, odometer, car_vin if not is_listing_page else 'NA'
+    )
     return car_data
 
 
-async def get_next_page_url(html: str, current_url: str) -> Optional[str]:
+def build_next_page_url(current_url: str) -> str:
+    """
+    Build the next listing page URL by incrementing its page query parameter
+    
+    Args:
+        current_url: URL of the listing page, without a page parameter on the first page
+        
+    Returns:
+        URL of the next page
+    """
+    parts = urlsplit(current_url)
+    params = dict(parse_qsl(parts.query, keep_blank_values=True))
+    page_number = params.get("page", "")
+    params["page"] = str(int(page_number) + 1 if page_number.isdigit() else 2)
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+async def get_next_page_url(html: Union[str, HtmlElement], current_url: str) -> Optional[str]:
     """
     Extract the URL for the next page if it exists
+    
+    Args:
+        html: HTML content of the page, or the page as parsed by parse_html
+        current_url: URL of the page, relative links are resolved against it
+        
+    Returns:
+        Absolute URL of the next page, or None
     """
-    soup = BeautifulSoup(html, "lxml")
-    
-    # Try different selectors for next page link
-    selectors = [
-        ".pagination .next a[href]",
-        ".pager a.next[href]",
-        ".pagination a.arrow-right[href]",
-        ".search-result-pager a.page-link[rel='next'][href]",
-        ".pager a.js-next[href]",
-        "a[rel='next'][href]"
-    ]
-    
-    for selector in selectors:
-        next_link = soup.select_one(selector)
-        if next_link and next_link.get("href"):
-            next_page_url = next_link["href"]
+    return find_next_page_link(parse_html(html) if isinstance(html, str) else html, current_url)
+
+
+def find_next_page_link(root: HtmlElement, current_url: str) -> Optional[str]:
+    """
+    Find the next page link in a parsed listing page
+    
+    Args:
+        root: The page as parsed by parse_html
+        current_url: URL of the page, relative links are resolved against it
+        
+    Returns:
+        Absolute URL of the next page, or None
+    """
+    # The site's own paginator first, any other known next link otherwise
+    next_links = NEXT_PAGE_XPATH(root) or OTHER_NEXT_PAGE_XPATH(root)
+    for next_link in next_links:
+        next_page_url = next_link.get("href")
+        if next_page_url:
             if not next_page_url.startswith('http'):
                 next_page_url = urljoin(current_url, next_page_url)
             return next_page_url
     
-    return None 
\ No newline at end of file
+    return None
+
+
+# Worker processes for page parsing, see start_parse_pool
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+# Parsed detail pages by (url, hash of the HTML), so retries and repeated
+# pages skip parsing, least recently used entries are dropped first
+PARSE_CACHE_SIZE = 2048
+_parse_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+
+
+def _init_parse_worker():
+    """Log straight to the handlers in a parse worker, the parent's queue listener doesn't run there"""
+    logging.getLogger().handlers = [file_handler, stream_handler]
+
+
+def start_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Start the detail page parsing processes if they aren't running yet
+    
+    Every worker is started right away so the first scraped pages don't pay
+    for process startup.
+    
+    Returns:
+        The pool, or None if PARSE_PROCESSES is 0
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None and settings.PARSE_PROCESSES != 0:
+            workers = settings.PARSE_PROCESSES or os.cpu_count() or 1
+            _parse_pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker)
+            for future in [_parse_pool.submit(int) for _ in range(workers)]:
+                future.result()
+            logger.info(f"Started {workers} parse worker processes")
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Stop the parse worker processes"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+
+def clear_parse_cache():
+    """Forget parsed pages, called at the start of every scrape run"""
+    _parse_cache.clear()
+
+
+def parse_listing_page(html: str, url: str) -> Tuple[List[str], Optional[str]]:
+    """
+    Parse a listing page once for its car URLs and the next page link
+    
+    Args:
+        html: HTML content of the page
+        url: URL of the page
+        
+    Returns:
+        Tuple of (car URLs, next page URL or None when there is no other page)
+    """
+    root = parse_html(html)
+    next_page_url = find_next_page_link(root, url)
+    return find_listing_links(html, root), next_page_url if next_page_url != url else None
+
+
+async def parse_listing_page_in_pool(html: str, url: str) -> Tuple[List[str], Optional[str]]:
+    """
+    Parse a listing page in a worker process, keeping the event loop free
+    
+    Args:
+        html: HTML content of the page
+        url: URL of the page
+        
+    Returns:
+        Result of parse_listing_page
+    """
+    pool = _parse_pool or await asyncio.to_thread(start_parse_pool)
+    if pool is None:
+        return await asyncio.to_thread(parse_listing_page, html, url)
+    return await asyncio.get_running_loop().run_in_executor(pool, parse_listing_page, html, url)
+
+
+async def parse_car_detail_page_in_pool(html: str, url: str) -> Dict[str, Any]:
+    """
+    Parse a car detail page in a worker process, keeping the event loop free
+    
+    A page parsed before with the same URL and HTML is served from the cache.
+    
+    Args:
+        html: HTML content of the page
+        url: URL of the page
+        
+    Returns:
+        Car data as returned by parse_car_detail_page, a copy the caller may change
+    """
+    key = (url, hash(html))
+    car_data = _parse_cache.get(key)
+    if car_data is not None:
+        _parse_cache.move_to_end(key)
+        logger.debug("Using cached parse of %s", url)
+        return dict(car_data)
+    
+    pool = _parse_pool or await asyncio.to_thread(start_parse_pool)
+    if pool is None:
+        car_data = await asyncio.to_thread(parse_car_detail_page, html, url)
+    else:
+        car_data = await asyncio.get_running_loop().run_in_executor(pool, parse_car_detail_page, html, url)
+    
+    _parse_cache[key] = car_data
+    if len(_parse_cache) > PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+    return dict(car_data)
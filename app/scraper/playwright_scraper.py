@@ -1,24 +1,77 @@
 import asyncio
-import os
 import re
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import time
 import random
 import json
-from typing import List, Dict, Any, Optional
+from io import BytesIO
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from lxml import etree
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
 
 from app.config import settings, logger
-from app.scraper.parser import parse_car_detail_page
+from app.scraper.parser import NON_DIGIT_BYTES, TITLE_PATTERN, absolutize, build_next_page_url, has_class, keep_chars, looks_like_anti_bot, parse_car_detail_page_in_pool, parse_html
+from app.scraper.parser import get_next_page_url as parse_next_page_url
+from app.scraper.enhanced_playwright_scraper import block_unneeded_resources, has_saved_browser_state, save_debug_html, save_debug_screenshot
 from app.db.models import Car
+from app.db.database import insert_cars
 
 
-async def setup_browser():
+# Patterns used on every page, compiled once
+AD_ID_PATTERN = re.compile(r'auto_[^_]+_(\d+)\.html')
+AUTO_LINK_PATTERN = re.compile(r'(?:href|link|url)=[\"\']?([^\"\'\s>]+auto_[^\"\']+\.html)')
+PHONE_PATTERN = re.compile(r'(?<!\d)(?:\+38)?[(\s-]*(?:0\d{2}|\(\d{3}\))[\s-]*\d{3}[\s-]*\d{2}[\s-]*\d{2}(?!\d)')
+
+# Stealth script run in every page before the site's own scripts, read once at import
+STEALTH_INIT_JS = Path(__file__).with_name("playwright_stealth.js").read_text(encoding="utf-8")
+
+# Scrolls to up to three random viewport-sized positions, pausing 0.5-2 s after each
+RANDOM_SCROLL_JS = """async () => {
+    const height = document.body.scrollHeight;
+    const step = window.innerHeight;
+    const positions = [];
+    for (let y = 0; step > 0 && y < height; y += step) {
+        positions.push(y);
+    }
+    for (let i = positions.length - 1; i > 0; i--) {
+        const j = Math.floor(Math.random() * (i + 1));
+        [positions[i], positions[j]] = [positions[j], positions[i]];
+    }
+    for (const y of positions.slice(0, 3)) {
+        window.scrollTo(0, y);
+        await new Promise(resolve => setTimeout(resolve, 500 + Math.random() * 1500));
+    }
+}"""
+
+# Words of challenge pages served instead of a listing
+CHALLENGE_MARKERS = ("captcha", "bot detected", "access denied", "verify you are human")
+
+# Car links of a listing page: auto_*.html hrefs, or data-link-to-view attributes on pages without them
+DATA_LINK_XPATH = etree.XPath("descendant::*[contains(@data-link-to-view, 'auto_')]/@data-link-to-view")
+
+# Revealed phone number, tried in order: .phones .phone, .phone-number, [data-phone-number], .show-phone span
+PHONE_XPATHS = [etree.XPath(xpath) for xpath in (
+    f"descendant::*[{has_class('phones')}]/descendant::*[{has_class('phone')}]",
+    f"descendant::*[{has_class('phone-number')}]",
+    "descendant::*[@data-phone-number]",
+    f"descendant::*[{has_class('show-phone')}]/descendant::span",
+)]
+
+# Link right after the current page indicator, or inside the element after it
+NEXT_AFTER_ACTIVE_SELECTOR = ", ".join(
+    f"{active} + a[href], {active} + * a[href]" for active in (".pagination .active", ".pager .active", ".page-item.active")
+)
+
+
+async def launch_browser() -> Tuple[Playwright, Browser]:
     """
-    Setup Playwright browser with advanced stealth settings to avoid detection
+    Start Playwright and launch Chromium with stealth flags
+    
+    Returns:
+        Tuple of (playwright, browser), stopped and closed by the caller
     """
     playwright = await async_playwright().start()
     
@@ -43,7 +96,23 @@ async def setup_browser():
             '--window-size=1920,1080'
         ]
     )
+    return playwright, browser
+
+
+async def new_stealth_context(browser: Browser, storage_state: Optional[Union[str, Dict[str, Any]]] = None) -> BrowserContext:
+    """
+    Open an isolated browser context with stealth settings
+    
+    Contexts are far cheaper than browsers and keep cookies apart, so each
+    concurrently scraped car page gets its own.
     
+    Args:
+        browser: Launched browser
+        storage_state: Cookies and storage to start the context with, or the file they were saved to
+        
+    Returns:
+        The new context, the caller closes it
+    """
     # Create a context with realistic viewport and user agent
     context = await browser.new_context(
         viewport={'width': 1920, 'height': 1080},
@@ -55,7 +124,8 @@ async def setup_browser():
         java_script_enabled=True,
         has_touch=False,
         is_mobile=False,
-        device_scale_factor=1
+        device_scale_factor=1,
+        storage_state=storage_state
     )
     
     # Add extra headers but keep simple to avoid fingerprinting
@@ -66,143 +136,50 @@ async def setup_browser():
     })
     
     # Emulate non-automation behavior by injecting enhanced stealth script
-    await context.add_init_script("""
-        // Overwrite the 'navigator.webdriver' property
-        Object.defineProperty(navigator, 'webdriver', {
-            get: () => undefined
-        });
-        
-        // Add chrome object
-        window.chrome = {
-            app: {
-                isInstalled: false,
-            },
-            webstore: {
-                onInstallStageChanged: {},
-                onDownloadProgress: {},
-            },
-            runtime: {
-                PlatformOs: {
-                    MAC: 'mac',
-                    WIN: 'win',
-                    ANDROID: 'android',
-                    CROS: 'cros',
-                    LINUX: 'linux',
-                    OPENBSD: 'openbsd',
-                },
-                PlatformArch: {
-                    ARM: 'arm',
-                    X86_32: 'x86-32',
-                    X86_64: 'x86-64',
-                },
-                PlatformNaclArch: {
-                    ARM: 'arm',
-                    X86_32: 'x86-32',
-                    X86_64: 'x86-64',
-                },
-                RequestUpdateCheckStatus: {
-                    THROTTLED: 'throttled',
-                    NO_UPDATE: 'no_update',
-                    UPDATE_AVAILABLE: 'update_available',
-                },
-                OnInstalledReason: {
-                    INSTALL: 'install',
-                    UPDATE: 'update',
-                    CHROME_UPDATE: 'chrome_update',
-                    SHARED_MODULE_UPDATE: 'shared_module_update',
-                },
-                OnRestartRequiredReason: {
-                    APP_UPDATE: 'app_update',
-                    OS_UPDATE: 'os_update',
-                    PERIODIC: 'periodic',
-                }
-            }
-        };
-        
-        // Add language plugins
-        Object.defineProperty(navigator, 'languages', {
-            get: () => ['uk-UA', 'uk', 'en-US', 'en'],
-        });
-        
-        // Add plugins to spoof plugin count
-        Object.defineProperty(navigator, 'plugins', {
-            get: () => {
-                const plugins = [
-                    {
-                        0: {type: 'application/pdf'},
-                        name: 'PDF Viewer',
-                        description: 'Portable Document Format',
-                        filename: 'internal-pdf-viewer'
-                    },
-                    {
-                        0: {type: 'application/pdf'},
-                        name: 'Chrome PDF Viewer',
-                        description: 'Portable Document Format',
-                        filename: 'internal-pdf-viewer'
-                    },
-                    {
-                        0: {type: 'application/x-google-chrome-pdf'},
-                        name: 'Chrome PDF Plugin',
-                        description: 'Portable Document Format',
-                        filename: 'internal-pdf-viewer'
-                    }
-                ];
-                plugins.forEach((plugin) => {
-                    plugin.__proto__ = Plugin.prototype;
-                });
-                return plugins;
-            },
-        });
-        
-        // Add permissions - notifications
-        const originalQuery = window.navigator.permissions.query;
-        window.navigator.permissions.query = (parameters) => (
-            parameters.name === 'notifications' ?
-            Promise.resolve({ state: Notification.permission }) :
-            originalQuery(parameters)
-        );
-        
-        // Add userActivation
-        Object.defineProperty(navigator, 'userActivation', {
-            get: () => {
-                return {
-                    hasBeenActive: true,
-                    isActive: true
-                };
-            }
-        });
-        
-        // Spoof webGL renderer
-        const getParameter = WebGLRenderingContext.prototype.getParameter;
-        WebGLRenderingContext.prototype.getParameter = function(parameter) {
-            // UNMASKED_RENDERER_WEBGL
-            if (parameter === 37446) {
-                return 'Intel Open Source Technology Center';
-            }
-            // UNMASKED_VENDOR_WEBGL
-            if (parameter === 37445) {
-                return 'Intel Inc.';
-            }
-            return getParameter.apply(this, arguments);
-        };
-    """)
+    await context.add_init_script(STEALTH_INIT_JS)
+    
+    # Only HTML and scripts are needed, skip images, fonts, styles and trackers
+    await context.route("**/*", block_unneeded_resources)
+    
+    return context
+
+
+async def open_stealth_page(context: BrowserContext) -> Page:
+    """
+    Open a page in a stealth context
     
-    # Create a new page
+    Args:
+        context: Context created by new_stealth_context
+        
+    Returns:
+        The new page
+    """
     page = await context.new_page()
     
-    # Add custom script to handle window.open
-    await page.evaluate("""
-        window.open = function(url, target, features) {
-            // Just log and do nothing to prevent popups
-            console.log('Window open called: ', url, target, features);
-            return null;
-        };
-    """)
+    # Routing turns off the HTTP cache, turn it back on for this page
+    cdp_session = await context.new_cdp_session(page)
+    await cdp_session.send("Network.setCacheDisabled", {"cacheDisabled": False})
     
     # Set default navigation timeout
     page.set_default_timeout(30000)  # 30 seconds
     
-    return playwright, browser, context, page
+    return page
+
+
+async def new_stealth_page(browser: Browser, storage_state: Optional[Dict[str, Any]] = None) -> Tuple[BrowserContext, Page]:
+    """
+    Open an isolated browser context with stealth settings and a page in it
+    
+    Args:
+        browser: Launched browser
+        storage_state: Cookies and storage to start the context with
+        
+    Returns:
+        Tuple of (context, page), the caller closes the context
+    """
+    context = await new_stealth_context(browser, storage_state)
+    page = await open_stealth_page(context)
+    return context, page
 
 
 async def fetch_with_playwright(url: str, page: Page) -> str:
@@ -253,18 +230,14 @@ async def fetch_with_playwright(url: str, page: Page) -> str:
         # Log success
         logger.info(f"Successfully fetched {url} with Playwright: {len(content)} bytes")
         
-        # Save for debugging
-        debug_dir = "debug"
-        os.makedirs(debug_dir, exist_ok=True)
-        filename = f"playwright_response_{int(time.time())}.html"
-        with open(os.path.join(debug_dir, filename), "w", encoding="utf-8") as f:
-            f.write(content)
-        logger.info(f"Saved response to {os.path.join(debug_dir, filename)}")
-        
-        # Also save a screenshot for debugging
-        screenshot_path = os.path.join(debug_dir, f"playwright_screenshot_{int(time.time())}.png")
-        await page.screenshot(path=screenshot_path, full_page=True)
-        logger.info(f"Saved screenshot to {screenshot_path}")
+        # Save for debugging, without blocking the loop, and only the viewport in the screenshot
+        if settings.DEBUG_DUMP_HTML:
+            file_path = await save_debug_html("playwright_response", content)
+            logger.info(f"Saved response to {file_path}")
+            
+            # Also save a screenshot for debugging
+            screenshot_path = await save_debug_screenshot(page, "playwright_screenshot")
+            logger.info(f"Saved screenshot to {screenshot_path}")
         
         return content
     except Exception as e:
@@ -279,19 +252,8 @@ async def simulate_human_behavior(page: Page):
     """
     Simulate human-like behavior on the page
     """
-    # Get page height
-    page_height = await page.evaluate('document.body.scrollHeight')
-    viewport_height = await page.evaluate('window.innerHeight')
-    
-    # Perform random scrolling
-    scroll_positions = list(range(0, page_height, viewport_height))
-    random.shuffle(scroll_positions)  # Randomize scroll positions
-    
-    # Scroll to a few random positions
-    for i, pos in enumerate(scroll_positions[:min(3, len(scroll_positions))]):
-        await page.evaluate(f'window.scrollTo(0, {pos})')
-        # Random pause between scrolls
-        await asyncio.sleep(random.uniform(0.5, 2.0))
+    # Scroll to a few random positions with pauses, all in one evaluate call
+    await page.evaluate(RANDOM_SCROLL_JS)
     
     # Random mouse movements (optional)
     if random.random() > 0.5:
@@ -302,97 +264,62 @@ async def simulate_human_behavior(page: Page):
             await asyncio.sleep(random.uniform(0.2, 0.7))
 
 
+def iter_listing_hrefs(html: str) -> Iterator[str]:
+    """
+    Stream the auto_*.html links of a listing page without building its whole tree
+    
+    Each anchor is cleared once read and everything parsed before it is dropped,
+    so only the open ancestors of the current anchor stay in memory.
+    
+    Args:
+        html: HTML content of the listing page
+        
+    Yields:
+        Car page hrefs in page order, possibly repeated
+    """
+    try:
+        for _, anchor in etree.iterparse(BytesIO(html.encode("utf-8")), tag="a", html=True):
+            href = anchor.get("href")
+            if href and "auto_" in href and href.endswith(".html"):
+                yield href
+            anchor.clear(keep_tail=True)
+            # Finished elements before the anchor are never visited again
+            node, parent = anchor, anchor.getparent()
+            while parent is not None:
+                while node.getprevious() is not None:
+                    del parent[0]
+                node, parent = parent, parent.getparent()
+    except etree.XMLSyntaxError:
+        # Raised at the end of an empty document, there are no links to yield
+        return
+
+
 async def parse_car_listing_page(html: str) -> List[str]:
     """
     Parse a listing page and extract all car detail URLs
     """
-    soup = BeautifulSoup(html, "lxml")
-    car_links = []
-    
-    # Save HTML for debugging
-    debug_dir = "debug"
-    os.makedirs(debug_dir, exist_ok=True)
-    with open(os.path.join(debug_dir, "listing_page_playwright.html"), "w", encoding="utf-8") as f:
-        f.write(html)
-    logger.info(f"Saved listing page HTML to {os.path.join(debug_dir, 'listing_page_playwright.html')}")
+    # Save HTML for debugging, without blocking the loop
+    file_path = await save_debug_html("listing_page_playwright", html)
+    if file_path:
+        logger.info(f"Saved listing page HTML to {file_path}")
     
     # Log page title for debugging
-    page_title = soup.title.text if soup.title else "No title"
+    title_match = TITLE_PATTERN.search(html)
+    page_title = title_match.group(1).strip() if title_match else "No title"
     logger.info(f"Page title: {page_title}")
     
-    # Approach 1: Try all possible selectors for car listings
-    selectors_to_try = [
-        "section.ticket-item",                 # Classic format
-        "div.ticket-item",                     # Alternative format
-        "div.content-ticket",                  # Alternative format
-        "div.content-bar",                     # Container format
-        ".search-result .ticket-item",         # Nested format
-        "div.app-catalog .app-catalog-item",   # Modern app format
-        ".content-bar",                        # Container only
-        ".app-catalog a[href*='auto_']",       # Direct links in modern format
-        "a.address[href*='auto_']",            # Direct address links
-        "a[href*='auto_'][href$='.html']"      # Any auto link
-    ]
-    
-    for selector in selectors_to_try:
-        elements = soup.select(selector)
-        logger.info(f"Found {len(elements)} elements with selector '{selector}'")
-        
-        if elements:
-            for element in elements:
-                try:
-                    # Extract URL from different possible locations
-                    car_url = None
-                    
-                    # First check if the element itself is a link
-                    if element.name == 'a' and element.get('href') and 'auto_' in element.get('href'):
-                        car_url = element.get('href')
-                    else:
-                        # Try to find links inside the element
-                        # First look for direct auto_ links
-                        link_element = element.select_one('a[href*="auto_"]')
-                        if link_element:
-                            car_url = link_element.get('href')
-                        else:
-                            # Try data-link-to-view attribute
-                            data_link = element.select_one('[data-link-to-view]')
-                            if data_link:
-                                car_url = data_link.get('data-link-to-view')
-                            else:
-                                # Try address class links
-                                address_link = element.select_one('a.address')
-                                if address_link:
-                                    car_url = address_link.get('href')
-                                else:
-                                    # Try photo links
-                                    photo_link = element.select_one('.ticket-photo a')
-                                    if photo_link:
-                                        car_url = photo_link.get('href')
-                    
-                    # Process URL if found
-                    if car_url:
-                        if not car_url.startswith('http'):
-                            car_url = urljoin("https://auto.ria.com", car_url)
-                        
-                        if car_url not in car_links:
-                            car_links.append(car_url)
-                            logger.debug(f"Found car URL: {car_url}")
-                except Exception as e:
-                    logger.error(f"Error processing car element: {e}")
+    # Approach 1: Every listing format links its cars through an auto_ href, modern
+    # pages may only have data-link-to-view attributes, those need the parsed tree.
+    # A dict drops repeated links while keeping them in page order
+    car_links = list(dict.fromkeys(map(absolutize, iter_listing_hrefs(html))))
+    if not car_links:
+        car_links = list(dict.fromkeys(map(absolutize, DATA_LINK_XPATH(parse_html(html)))))
     
     # Approach 2: If no car links found yet, look for any auto_*.html links in the page
     if not car_links:
         logger.info("No car links found with selectors, trying regex pattern matching")
         # Use regex to find all auto_*.html links in the HTML
-        auto_links = re.findall(r'(?:href|link|url)=[\"\']?([^\"\'\s>]+auto_[^\"\']+\.html)', html)
-        for link in auto_links:
-            if not link.startswith('http'):
-                link = urljoin("https://auto.ria.com", link)
-            if link not in car_links:
-                car_links.append(link)
-    
-    # Filter out duplicate links
-    car_links = list(set(car_links))
+        car_links = list(dict.fromkeys(map(absolutize, AUTO_LINK_PATTERN.findall(html))))
     
     logger.info(f"Successfully extracted {len(car_links)} car links from page")
     # Log the first few links for debugging
@@ -421,19 +348,21 @@ async def extract_phone_number(page: Page, car_url: str, ad_id: str) -> Optional
         # First try API method
         phone_api_url = f"https://auto.ria.com/users/phones/{ad_id}"
         
-        logger.info(f"Navigating to phone API: {phone_api_url}")
-        
-        # Add necessary headers
-        await page.set_extra_http_headers({
-            "Referer": car_url,
-            "X-Requested-With": "XMLHttpRequest",
-            "Accept": "application/json"
-        })
+        logger.info(f"Requesting phone API: {phone_api_url}")
         
-        # Navigate to the API URL
-        response = await page.goto(phone_api_url, wait_until="networkidle")
+        # Request the API with the context's cookies but without rendering anything,
+        # the page stays on the car page
+        response = await page.context.request.get(
+            phone_api_url,
+            headers={
+                "Referer": car_url,
+                "X-Requested-With": "XMLHttpRequest",
+                "Accept": "application/json"
+            },
+            timeout=10000
+        )
         
-        if response and response.ok:
+        if response.ok:
             # Get the response body
             content = await response.text()
             
@@ -449,9 +378,13 @@ async def extract_phone_number(page: Page, car_url: str, ad_id: str) -> Optional
             except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON response from phone API: {content[:100]}")
         
-        # If API method fails, try UI method
-        # Go back to the car page
-        await page.goto(car_url, wait_until="networkidle")
+        # If API method fails, try UI method on the car page that is still open,
+        # waiting only for a phone button to render
+        try:
+            await page.wait_for_selector(", ".join(phone_button_selectors), timeout=3000)
+        except Exception:
+            logger.info(f"No phone button appeared on {car_url}")
+            return None
         
         # Try to find and click each possible phone button
         for selector in phone_button_selectors:
@@ -463,31 +396,24 @@ async def extract_phone_number(page: Page, car_url: str, ad_id: str) -> Optional
                 
                 # Look for phone numbers on the page after clicking
                 content = await page.content()
-                soup = BeautifulSoup(content, "lxml")
+                root = parse_html(content)
                 
                 # Try different ways to extract phone number
-                phone_selectors = [
-                    ".phones .phone", 
-                    ".phone-number", 
-                    "[data-phone-number]",
-                    ".show-phone span"
-                ]
-                
-                for phone_selector in phone_selectors:
-                    phone_elements = soup.select(phone_selector)
+                for phone_xpath in PHONE_XPATHS:
+                    phone_elements = phone_xpath(root)
                     if phone_elements:
                         # Get the first phone number found
-                        phone_text = phone_elements[0].text.strip()
+                        phone_text = phone_elements[0].text_content().strip()
                         # Clean up the phone number
-                        phone = re.sub(r'\D', '', phone_text)
+                        phone = keep_chars(phone_text, NON_DIGIT_BYTES)
                         if phone and len(phone) >= 10:
                             return phone
                 
                 # Also try regex to find any phone number pattern in the page content
-                phone_matches = re.findall(r'(?<!\d)(?:\+38)?[(\s-]*(?:0\d{2}|\(\d{3}\))[\s-]*\d{3}[\s-]*\d{2}[\s-]*\d{2}(?!\d)', content)
-                if phone_matches:
+                phone_match = PHONE_PATTERN.search(content)
+                if phone_match:
                     # Clean up the phone number
-                    phone = re.sub(r'\D', '', phone_matches[0])
+                    phone = keep_chars(phone_match.group(0), NON_DIGIT_BYTES)
                     if phone and len(phone) >= 10:
                         return phone
     
@@ -497,14 +423,21 @@ async def extract_phone_number(page: Page, car_url: str, ad_id: str) -> Optional
     return None
 
 
-async def process_car_page(car_url: str, page: Page, session: AsyncSession) -> None:
+async def scrape_car_data(car_url: str, page: Page) -> Optional[Dict[str, Any]]:
     """
-    Process a single car detail page
+    Scrape a single car detail page
+    
+    Args:
+        car_url: URL of the car detail page
+        page: Playwright page object
+        
+    Returns:
+        Car data ready to be stored, or None if the page could not be scraped
     """
     try:
         # Extract advertisement ID from URL
         ad_id = None
-        url_match = re.search(r'auto_[^_]+_(\d+)\.html', car_url)
+        url_match = AD_ID_PATTERN.search(car_url)
         if url_match:
             ad_id = url_match.group(1)
         
@@ -512,10 +445,10 @@ async def process_car_page(car_url: str, page: Page, session: AsyncSession) -> N
         car_html = await fetch_with_playwright(car_url, page)
         if not car_html:
             logger.error(f"Failed to fetch car page: {car_url}")
-            return
+            return None
         
         # Parse car data
-        car_data = await parse_car_detail_page(car_html, car_url)
+        car_data = await parse_car_detail_page_in_pool(car_html, car_url)
         
         # If ad_id was found and no phone number in parsed data, try to get it via API
         if ad_id and not car_data.get('phone_number'):
@@ -524,24 +457,34 @@ async def process_car_page(car_url: str, page: Page, session: AsyncSession) -> N
             if phone_number:
                 car_data['phone_number'] = phone_number
         
-        # Check if car with this URL already exists
-        stmt = select(Car).where(Car.url == car_data["url"])
-        result = await session.execute(stmt)
-        existing_car = result.scalar_one_or_none()
-        
-        if existing_car:
-            logger.info(f"Car with URL {car_data['url']} already exists, skipping")
-            return
-        
-        # Create new car record
-        car = Car(**car_data)
-        session.add(car)
-        await session.commit()
-        logger.info(f"Saved car: {car_data['title']} with VIN {car_data.get('car_vin', 'unknown')}")
+        return car_data
         
     except Exception as e:
-        await session.rollback()
         logger.error(f"Error processing car page {car_url}: {e}")
+        return None
+
+
+async def scrape_car_in_context(car_url: str, browser: Browser, semaphore: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    """
+    Scrape a car page in its own browser context once a slot is free
+    
+    Args:
+        car_url: URL of the car detail page
+        browser: Browser the context is opened in
+        semaphore: Limits how many car pages are open at once
+        
+    Returns:
+        Car data as returned by scrape_car_data
+    """
+    async with semaphore:
+        context, page = await new_stealth_page(browser)
+        try:
+            car_data = await scrape_car_data(car_url, page)
+        finally:
+            await context.close()
+        # Add a small delay before the slot is reused to avoid rate limiting
+        await asyncio.sleep(random.uniform(2.0, 4.0))
+    return car_data
 
 
 async def get_next_page_url(page: Page, current_url: str) -> Optional[str]:
@@ -574,28 +517,19 @@ async def get_next_page_url(page: Page, current_url: str) -> Optional[str]:
                     logger.info(f"Found next page URL: {next_page_url}")
                     return next_page_url
         
-        # If no next page link is found via selectors, try a fallback approach
-        # Check if there's a current page indicator and try to find the next page
-        content = await page.content()
-        soup = BeautifulSoup(content, "lxml")
-        
-        # Look for pagination elements with active/current class
-        current_page_elements = soup.select(".pagination .active, .pager .active, .page-item.active")
-        if current_page_elements:
-            for current_elem in current_page_elements:
-                # Try to find the next sibling that's a link
-                next_sibling = current_elem.find_next_sibling()
-                if next_sibling and next_sibling.name == 'a' or next_sibling.find('a'):
-                    link_elem = next_sibling if next_sibling.name == 'a' else next_sibling.find('a')
-                    if link_elem and link_elem.get('href'):
-                        href = link_elem.get('href')
-                        if not href.startswith('http'):
-                            next_page_url = urljoin(current_url, href)
-                        else:
-                            next_page_url = href
-                        
-                        logger.info(f"Found next page URL via pagination: {next_page_url}")
-                        return next_page_url
+        # If no next page link is found via selectors, try a fallback approach:
+        # the link in the element right after the current page indicator
+        next_link = await page.query_selector(NEXT_AFTER_ACTIVE_SELECTOR)
+        if next_link:
+            href = await next_link.get_attribute('href')
+            if href:
+                if not href.startswith('http'):
+                    next_page_url = urljoin(current_url, href)
+                else:
+                    next_page_url = href
+                
+                logger.info(f"Found next page URL via pagination: {next_page_url}")
+                return next_page_url
         
         logger.info("No next page URL found")
         return None
@@ -605,6 +539,48 @@ async def get_next_page_url(page: Page, current_url: str) -> Optional[str]:
         return None
 
 
+async def fetch_html_via_request(url: str, context: BrowserContext) -> str:
+    """
+    Fetch a page's HTML with the context's request client, without rendering it
+    
+    The request carries the context's cookies and user agent.
+    
+    Args:
+        url: URL of the page
+        context: Browser context to send the request from
+        
+    Returns:
+        HTML content, or an empty string if the request failed
+    """
+    try:
+        response = await context.request.get(url, headers={'Accept': 'text/html,application/xhtml+xml'}, timeout=30000)
+        if not response.ok:
+            logger.warning(f"Request for {url} failed: Status {response.status}")
+            return ""
+        return await response.text()
+    except Exception as e:
+        logger.warning(f"Request for {url} failed: {e}")
+        return ""
+
+
+async def find_next_page_url(html: str, page: Optional[Page], current_url: str) -> Optional[str]:
+    """
+    Find the next listing page link in the fetched HTML, or in the live page
+    
+    Args:
+        html: HTML content of the listing page
+        page: Page the listing was loaded in, None if it was fetched without the browser
+        current_url: URL of the listing page
+        
+    Returns:
+        URL of the next page, or None
+    """
+    next_page_url = await parse_next_page_url(html, current_url)
+    if next_page_url is None and page is not None:
+        next_page_url = await get_next_page_url(page, current_url)
+    return next_page_url
+
+
 async def run_playwright_scraper(db_session: AsyncSession) -> None:
     """
     Main scraper function using Playwright for browser automation
@@ -612,13 +588,30 @@ async def run_playwright_scraper(db_session: AsyncSession) -> None:
     start_time = time.time()
     logger.info("Starting AutoRia scraper with Playwright browser automation...")
     
-    # Initialize Playwright
-    playwright, browser, context, page = await setup_browser()
+    # Initialize Playwright, the listing page is only opened if a listing has to be rendered
+    playwright, browser = await launch_browser()
+    # Start from the cookies of the last run so the site doesn't see a new visitor
+    saved_state = settings.BROWSER_STATE_FILE if has_saved_browser_state() else None
+    context = await new_stealth_context(browser, saved_state)
+    if saved_state:
+        logger.info(f"Restored browser state from {saved_state}")
+    page: Optional[Page] = None
+    # Request for the next listing page, sent while the current page's cars are scraped
+    next_listing_task: Optional[asyncio.Task] = None
+    semaphore = asyncio.Semaphore(settings.BROWSER_POOL_SIZE)
     
     try:
+        # Load stored URLs once, cars seen on this run are added so repeats are never scraped again
+        known_urls: Set[str] = set((await db_session.scalars(select(Car.url))).all())
+        logger.info(f"Loaded {len(known_urls)} known car URLs")
+        
         # Start with the initial URL
         current_page_url = settings.AUTO_RIA_START_URL
         page_count = 0
+        # Listing pages served by the current context, it is replaced at BROWSER_CONTEXT_MAX_PAGES
+        context_pages = 0
+        # Car links of the last page, to notice when the site keeps serving it
+        previous_page_urls: List[str] = []
         
         # Process pages until there are no more pages or limit is reached
         max_pages = 1 if settings.TEST_MODE else settings.MAX_PAGES
@@ -628,8 +621,33 @@ async def run_playwright_scraper(db_session: AsyncSession) -> None:
         while current_page_url and page_count < max_pages:
             logger.info(f"Processing page {page_count + 1}: {current_page_url}")
             
-            # Fetch the page
-            html = await fetch_with_playwright(current_page_url, page)
+            # Take the listing fetched ahead, before its context can be replaced
+            html = None
+            if next_listing_task is not None:
+                html = await next_listing_task
+                next_listing_task = None
+            
+            # Replace a long-lived context before its memory use grows, keeping its cookies
+            if context_pages >= settings.BROWSER_CONTEXT_MAX_PAGES:
+                storage_state = await context.storage_state()
+                await context.close()
+                context = await new_stealth_context(browser, storage_state)
+                page = None
+                context_pages = 0
+                logger.info("Replaced the listing browser context")
+            context_pages += 1
+            
+            # Listing pages are server-rendered, fetch them without the browser and
+            # only load them in the page when that is blocked
+            if html is None:
+                html = await fetch_html_via_request(current_page_url, context)
+            listing_page = None
+            if not html or looks_like_anti_bot(html, CHALLENGE_MARKERS):
+                logger.info(f"Loading {current_page_url} in the browser")
+                if page is None:
+                    page = await open_stealth_page(context)
+                html = await fetch_with_playwright(current_page_url, page)
+                listing_page = page
             if not html:
                 logger.error(f"Failed to fetch page {current_page_url}")
                 break
@@ -641,7 +659,7 @@ async def run_playwright_scraper(db_session: AsyncSession) -> None:
                 logger.warning(f"No car URLs found on page {current_page_url}")
                 
                 # Check if there's a next page even if no cars found
-                next_page_url = await get_next_page_url(page, current_page_url)
+                next_page_url = await find_next_page_url(html, listing_page, current_page_url)
                 if next_page_url:
                     logger.info(f"No cars found but next page exists: {next_page_url}")
                     current_page_url = next_page_url
@@ -653,31 +671,52 @@ async def run_playwright_scraper(db_session: AsyncSession) -> None:
             
             logger.info(f"Found {len(car_urls)} car URLs on page {current_page_url}")
             
-            # Process car URLs sequentially
+            # Past the last page the site can serve the last page again
+            if car_urls == previous_page_urls:
+                logger.info("Page repeats the previous one, no more pages to process")
+                break
+            previous_page_urls = car_urls
+            
+            # Fetch the next listing while this page's cars are scraped
+            if page_count + 1 < max_pages:
+                next_listing_task = asyncio.create_task(
+                    fetch_html_via_request(build_next_page_url(current_page_url), context)
+                )
+            
+            # Skip stored cars and ads repeated from earlier pages
+            car_urls = [car_url for car_url in car_urls if car_url not in known_urls]
+            known_urls.update(car_urls)
+            logger.info(f"{len(car_urls)} of them are new")
+            
             # In test mode, only process the first few links
             if settings.TEST_MODE:
                 test_limit = 3  # For testing
                 logger.info(f"TEST MODE: Processing only {test_limit} cars")
                 car_urls = car_urls[:test_limit]
             
-            # Process each car URL
-            for car_url in car_urls:
-                await process_car_page(car_url, page, db_session)
-                # Add a small delay between requests to avoid rate limiting
-                await asyncio.sleep(random.uniform(2.0, 4.0))
+            # Scrape car URLs concurrently, each in its own context, the listing page stays on its page
+            cars = await asyncio.gather(*(
+                scrape_car_in_context(car_url, browser, semaphore) for car_url in car_urls
+            ))
             
-            # Get the URL for the next page
-            next_page_url = await get_next_page_url(page, current_page_url)
-            if not next_page_url or next_page_url == current_page_url:
-                logger.info("No more pages to process")
-                break
+            # Store the page's cars at once, URLs already stored are skipped by the insert
+            rows = [car_data for car_data in cars if car_data]
+            inserted = await insert_cars(db_session, rows)
+            logger.info(f"Saved {inserted} new cars of {len(rows)} scraped on page {current_page_url}")
             
-            current_page_url = next_page_url
+            # The next page only differs in its page parameter, a page with no cars
+            # past the last one falls back to the pagination links above
+            current_page_url = build_next_page_url(current_page_url)
             page_count += 1
             
             # Add a delay between pages to avoid rate limiting
             await asyncio.sleep(random.uniform(3.0, 5.0))
         
+        # Keep the cookies of this run for the next one
+        if settings.BROWSER_STATE_FILE:
+            await context.storage_state(path=settings.BROWSER_STATE_FILE)
+            logger.info(f"Saved browser state to {settings.BROWSER_STATE_FILE}")
+        
         elapsed_time = time.time() - start_time
         logger.info(f"Scraping completed. Processed {page_count} pages in {elapsed_time:.2f} seconds")
         
@@ -687,15 +726,12 @@ async def run_playwright_scraper(db_session: AsyncSession) -> None:
         logger.error(f"Traceback: {traceback.format_exc()}")
     
     finally:
-        # Clean up resources
-        if 'page' in locals():
-            await page.close()
-        if 'context' in locals():
-            await context.close()
-        if 'browser' in locals():
-            await browser.close()
-        if 'playwright' in locals():
-            await playwright.stop()
+        # Clean up resources, closing the context also closes its page
+        if next_listing_task is not None:
+            next_listing_task.cancel()
+        await context.close()
+        await browser.close()
+        await playwright.stop()
 
 
 async def test_playwright_scraper() -> Dict[str, Any]:
@@ -704,13 +740,21 @@ async def test_playwright_scraper() -> Dict[str, Any]:
     """
     logger.info("Testing Playwright scraper...")
     
+    # Nothing to test without a start URL, don't launch the browser for it
+    url = settings.AUTO_RIA_START_URL
+    if not url.startswith(("http://", "https://")):
+        return {
+            "success": False,
+            "error": f"Invalid start URL: {url!r}"
+        }
+    
     try:
         # Initialize Playwright
-        playwright, browser, context, page = await setup_browser()
+        playwright, browser = await launch_browser()
+        context, page = await new_stealth_page(browser)
         
         try:
             # Fetch the listing page
-            url = settings.AUTO_RIA_START_URL
             logger.info(f"Starting fetch from URL: {url}")
             
             # Navigate to the URL
@@ -736,11 +780,8 @@ async def test_playwright_scraper() -> Dict[str, Any]:
             # Parse the page to extract car URLs
             car_urls = await parse_car_listing_page(html)
             
-            # Take a screenshot for visual inspection
-            debug_dir = "debug"
-            os.makedirs(debug_dir, exist_ok=True)
-            screenshot_path = os.path.join(debug_dir, f"playwright_test_screenshot_{int(time.time())}.png")
-            await page.screenshot(path=screenshot_path, full_page=True)
+            # Take a screenshot of the viewport for visual inspection
+            screenshot_path = await save_debug_screenshot(page, "playwright_test_screenshot")
             logger.info(f"Saved test screenshot to {screenshot_path}")
             
             return {
@@ -764,8 +805,7 @@ async def test_playwright_scraper() -> Dict[str, Any]:
             }
         
         finally:
-            # Clean up resources
-            await page.close()
+            # Clean up resources, closing the context also closes its page
             await context.close()
             await browser.close()
             await playwright.stop()
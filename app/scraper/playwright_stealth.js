@@ -0,0 +1,126 @@
+// Anti-detection script registered as a context init script by playwright_scraper
+
+// Just log window.open calls and do nothing to prevent popups
+window.open = function(url, target, features) {
+    console.log('Window open called: ', url, target, features);
+    return null;
+};
+
+// Overwrite the 'navigator.webdriver' property
+Object.defineProperty(navigator, 'webdriver', {
+    get: () => undefined
+});
+
+// Add chrome object
+window.chrome = {
+    app: {
+        isInstalled: false,
+    },
+    webstore: {
+        onInstallStageChanged: {},
+        onDownloadProgress: {},
+    },
+    runtime: {
+        PlatformOs: {
+            MAC: 'mac',
+            WIN: 'win',
+            ANDROID: 'android',
+            CROS: 'cros',
+            LINUX: 'linux',
+            OPENBSD: 'openbsd',
+        },
+        PlatformArch: {
+            ARM: 'arm',
+            X86_32: 'x86-32',
+            X86_64: 'x86-64',
+        },
+        PlatformNaclArch: {
+            ARM: 'arm',
+            X86_32: 'x86-32',
+            X86_64: 'x86-64',
+        },
+        RequestUpdateCheckStatus: {
+            THROTTLED: 'throttled',
+            NO_UPDATE: 'no_update',
+            UPDATE_AVAILABLE: 'update_available',
+        },
+        OnInstalledReason: {
+            INSTALL: 'install',
+            UPDATE: 'update',
+            CHROME_UPDATE: 'chrome_update',
+            SHARED_MODULE_UPDATE: 'shared_module_update',
+        },
+        OnRestartRequiredReason: {
+            APP_UPDATE: 'app_update',
+            OS_UPDATE: 'os_update',
+            PERIODIC: 'periodic',
+        }
+    }
+};
+
+// Add language plugins
+Object.defineProperty(navigator, 'languages', {
+    get: () => ['uk-UA', 'uk', 'en-US', 'en'],
+});
+
+// Add plugins to spoof plugin count
+Object.defineProperty(navigator, 'plugins', {
+    get: () => {
+        const plugins = [
+            {
+                0: {type: 'application/pdf'},
+                name: 'PDF Viewer',
+                description: 'Portable Document Format',
+                filename: 'internal-pdf-viewer'
+            },
+            {
+                0: {type: 'application/pdf'},
+                name: 'Chrome PDF Viewer',
+                description: 'Portable Document Format',
+                filename: 'internal-pdf-viewer'
+            },
+            {
+                0: {type: 'application/x-google-chrome-pdf'},
+                name: 'Chrome PDF Plugin',
+                description: 'Portable Document Format',
+                filename: 'internal-pdf-viewer'
+            }
+        ];
+        plugins.forEach((plugin) => {
+            plugin.__proto__ = Plugin.prototype;
+        });
+        return plugins;
+    },
+});
+
+// Add permissions - notifications
+const originalQuery = window.navigator.permissions.query;
+window.navigator.permissions.query = (parameters) => (
+    parameters.name === 'notifications' ?
+    Promise.resolve({ state: Notification.permission }) :
+    originalQuery(parameters)
+);
+
+// Add userActivation
+Object.defineProperty(navigator, 'userActivation', {
+    get: () => {
+        return {
+            hasBeenActive: true,
+            isActive: true
+        };
+    }
+});
+
+// Spoof webGL renderer
+const getParameter = WebGLRenderingContext.prototype.getParameter;
+WebGLRenderingContext.prototype.getParameter = function(parameter) {
+    // UNMASKED_RENDERER_WEBGL
+    if (parameter === 37446) {
+        return 'Intel Open Source Technology Center';
+    }
+    // UNMASKED_VENDOR_WEBGL
+    if (parameter === 37445) {
+        return 'Intel Inc.';
+    }
+    return getParameter.apply(this, arguments);
+};
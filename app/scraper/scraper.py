@@ -1,72 +1,281 @@
 import httpx
+import orjson
 import asyncio
 import time
 import random
 import os
 import re
-from typing import List, Dict, Any
-from sqlalchemy.ext.asyncio import AsyncSession
+import gzip
+import hashlib
+import json
+from collections import deque
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Deque, Optional, Set, Tuple
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
 
 from app.config import settings, logger
 from app.scraper.parser import (
-    parse_car_listing_page,
-    parse_car_detail_page,
-    get_next_page_url,
-    format_phone_number
+    parse_listing_page_in_pool,
+    parse_car_detail_page_in_pool,
+    build_next_page_url,
+    format_phone_number,
+    looks_like_anti_bot
 )
+from app.db.database import copy_cars
 from app.db.models import Car
 
+# User agents rotated across requests
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:88.0) Gecko/20100101 Firefox/88.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1"
+)
+
+# Advertisement ID in a car page URL
+AD_ID_PATTERN = re.compile(r'auto_[^_]+_(\d+)\.html')
+# Advertisement ID attribute on a car page, read without parsing the page
+DATA_AD_ID_PATTERN = re.compile(r'data-advertisement-id=["\']?([^"\'\s>]+)')
+
+# Redirect hops fetch_page follows before giving up on a page
+MAX_REDIRECTS = 5
+
+# Concurrency changes of the AIMD controller, added per healthy response and multiplied per throttle
+CONCURRENCY_INCREASE = 0.5
+CONCURRENCY_DECREASE = 0.5
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header
+    
+    Args:
+        value: Header value, either seconds or an HTTP date
+        
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class AIMDController:
+    """
+    Request concurrency that adapts to how the site responds
+    
+    The limit grows additively while responses are healthy and is halved when
+    the site throttles us (403, 429, redirects to the homepage or a captcha),
+    so the scraper settles just below the live rate limit instead of relying
+    on fixed sleeps. A throttle also pauses new requests, for the Retry-After
+    period when the site sent one and a short random delay otherwise.
+    """
+    
+    def __init__(self, initial: int, max_limit: int, min_limit: int = 1):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, initial)
+        self.limit = float(initial)
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+        # Latencies of recent healthy responses, a slowing server is not pushed harder
+        self._latencies: Deque[float] = deque(maxlen=20)
+    
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        # Honor a Retry-After received while this request was waiting
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+    
+    async def on_success(self, latency: float) -> None:
+        """Raise the limit after a healthy response that was not slower than usual"""
+        is_slow = bool(self._latencies) and latency > 2 * sum(self._latencies) / len(self._latencies)
+        self._latencies.append(latency)
+        if is_slow:
+            return
+        async with self._condition:
+            self.limit = min(self.max_limit, self.limit + CONCURRENCY_INCREASE)
+            self._condition.notify_all()
+    
+    def on_throttle(self, retry_after: Optional[str] = None) -> None:
+        """Halve the limit and pause new requests for the Retry-After period, or a jittered REQUEST_DELAY"""
+        self.limit = max(self.min_limit, self.limit * CONCURRENCY_DECREASE)
+        retry_delay = parse_retry_after(retry_after) or random.uniform(0.5, 2.0) * settings.REQUEST_DELAY
+        self._resume_at = max(self._resume_at, time.monotonic() + retry_delay)
+        logger.warning(f"Throttled, request concurrency lowered to {int(self.limit)}")
+
+
+class ResponseCache:
+    """
+    Fetched pages kept on disk between runs
+    
+    Each URL has a gzipped body and a JSON file with its ETag, Last-Modified
+    and fetch time. Cached validators are sent as conditional request headers,
+    so an unchanged page costs a 304 instead of the whole body, and car pages
+    younger than the TTL are served without a request at all.
+    """
+    
+    def __init__(self, directory: str, ttl: int):
+        self.directory = directory
+        self.ttl = ttl
+    
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.html.gz")
+    
+    def _load(self, url: str) -> Optional[Dict[str, Any]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "rb") as f:
+                entry = json.loads(f.read())
+            with open(body_path, "rb") as f:
+                entry["body"] = gzip.decompress(f.read()).decode("utf-8")
+        except (OSError, ValueError):
+            return None
+        return entry
+    
+    def _store(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        # Body first, so metadata never points to a missing body; replace keeps readers off partial files
+        with open(f"{body_path}.tmp", "wb") as f:
+            f.write(gzip.compress(body.encode("utf-8"), compresslevel=5))
+        os.replace(f"{body_path}.tmp", body_path)
+        entry = {"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+    
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached page
+        
+        Args:
+            url: URL of the page
+            
+        Returns:
+            Dict with body, etag, last_modified and fetched_at, or None if not cached
+        """
+        return await asyncio.to_thread(self._load, url)
+    
+    async def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Cache a fetched page, failures are only logged
+        
+        Args:
+            url: URL of the page
+            body: HTML content
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        try:
+            await asyncio.to_thread(self._store, url, body, etag, last_modified)
+        except OSError as e:
+            logger.warning(f"Could not cache {url}: {e}")
+    
+    def is_fresh(self, url: str, entry: Dict[str, Any]) -> bool:
+        """Check whether a cached car page may be used without asking the server"""
+        return "auto_" in url and time.time() - entry["fetched_at"] < self.ttl
+
+
+# Disk cache of fetched pages, disabled unless RESPONSE_CACHE_DIR is set
+response_cache = ResponseCache(settings.RESPONSE_CACHE_DIR, settings.RESPONSE_CACHE_TTL) if settings.RESPONSE_CACHE_DIR else None
 
-async def fetch_page(url: str, client: httpx.AsyncClient) -> str:
+
+async def fetch_page(url: str, client: httpx.AsyncClient, controller: Optional[AIMDController] = None) -> str:
     """
     Fetch a page with retry logic
+    
+    Args:
+        url: URL of the page
+        client: HTTP client
+        controller: Concurrency controller told about throttling and healthy responses
+        
+    Returns:
+        HTML content of the page
     """
     max_retries = 3
     retry_delay = 2
     
-    # Add a small random delay to avoid being blocked
-    await asyncio.sleep(random.uniform(0.5, 2.0) * settings.REQUEST_DELAY)
+    # Car pages fetched recently enough are used as they are, others are revalidated
+    cached = await response_cache.get(url) if response_cache else None
+    if cached and response_cache.is_fresh(url, cached):
+        logger.debug("Using cached %s", url)
+        return cached["body"]
     
     for attempt in range(max_retries):
         try:
             logger.debug(f"Fetching URL: {url}")
             
             # Use a random User-Agent for each request
-            user_agents = [
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:90.0) Gecko/20100101 Firefox/90.0",
-                "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:88.0) Gecko/20100101 Firefox/88.0",
-                "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1"
-            ]
-            
             headers = client.headers.copy()
-            headers["User-Agent"] = random.choice(user_agents)
+            headers["User-Agent"] = random.choice(USER_AGENTS)
             # Add accept-language for Ukrainian content
             headers["Accept-Language"] = "uk-UA,uk;q=0.9,en-US;q=0.8,en;q=0.7"
+            if cached:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            
+            request_start = time.monotonic()
+            response = await client.get(url, headers=headers, follow_redirects=False)
             
-            response = await client.get(url, headers=headers, follow_redirects=True)
+            # Follow redirects by hand, a redirect away from car and listing pages (usually
+            # to the homepage) is a sign of being blocked and its target is never downloaded
+            for _ in range(MAX_REDIRECTS):
+                if not response.is_redirect:
+                    break
+                location = str(response.url.join(response.headers["location"]))
+                if "auto_" not in location and "/car/used/" not in location:
+                    logger.warning(f"Possible redirect to homepage detected: {url} -> {location}")
+                    if controller:
+                        controller.on_throttle()
+                    raise httpx.HTTPStatusError("Possible blocking detected", request=response.request, response=response)
+                response = await client.get(location, headers=headers, follow_redirects=False)
+            latency = time.monotonic() - request_start
             logger.info(f"HTTP Request: {response.request.method} {url} \"{response.http_version} {response.status_code} {response.reason_phrase}\"")
             
-            # Check for redirects to homepage (sign of being blocked)
-            if response.url != url and "auto_" not in str(response.url) and "/car/used/" not in str(response.url):
-                logger.warning(f"Possible redirect to homepage detected: {url} -> {response.url}")
-                raise httpx.HTTPStatusError("Possible blocking detected", request=response.request, response=response)
+            # Unchanged since it was cached
+            if response.status_code == 304 and cached:
+                if controller:
+                    await controller.on_success(latency)
+                return cached["body"]
             
-            if response.status_code == 403:
-                logger.error(f"Access forbidden (403) for URL: {url}. Possible anti-scraping measures detected.")
+            if response.status_code in (403, 429):
+                logger.error(f"Access refused ({response.status_code}) for URL: {url}. Possible anti-scraping measures detected.")
+                if controller:
+                    controller.on_throttle(response.headers.get("retry-after"))
                 raise httpx.HTTPStatusError("Access forbidden", request=response.request, response=response)
                 
             response.raise_for_status()
             
             # Check if the response is likely to be a CAPTCHA or blocked page
             content = response.text
-            if "captcha" in content.lower() or "robot" in content.lower() or "blocked" in content.lower():
+            if looks_like_anti_bot(content, ('captcha', 'robot', 'blocked')):
                 logger.error(f"Possible CAPTCHA or blocking detected on URL: {url}")
+                if controller:
+                    controller.on_throttle()
                 
                 # Save the page for debugging
                 debug_dir = "debug"
@@ -82,7 +291,11 @@ async def fetch_page(url: str, client: httpx.AsyncClient) -> str:
                     logger.info(f"Waiting {backoff_time} seconds before retry due to possible CAPTCHA...")
                     await asyncio.sleep(backoff_time)
                 continue
-                
+            
+            if controller:
+                await controller.on_success(latency)
+            if response_cache:
+                await response_cache.put(url, content, response.headers.get("etag"), response.headers.get("last-modified"))
             return content
         except httpx.HTTPError as e:
             logger.error(f"HTTP error fetching {url}: {e}")
@@ -99,127 +312,132 @@ async def fetch_page(url: str, client: httpx.AsyncClient) -> str:
             raise
 
 
-async def save_car_data(car_data: Dict[str, Any], session: AsyncSession) -> None:
+async def fetch_car_data(
+    car_url: str,
+    client: httpx.AsyncClient,
+    controller: Optional[AIMDController] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
-    Save car data to database, avoiding duplicates
+    Fetch and parse a single car detail page
+    
+    Args:
+        car_url: URL of the car detail page
+        client: HTTP client
+        controller: Concurrency controller passed on to fetch_page
+        
+    Returns:
+        Tuple of (car data or None if the page could not be processed,
+        advertisement ID when the phone number still has to be fetched)
     """
     try:
-        # Check if car with this URL already exists
-        stmt = select(Car).where(Car.url == car_data["url"])
-        result = await session.execute(stmt)
-        existing_car = result.scalar_one_or_none()
-        
-        if existing_car:
-            logger.info(f"Car with URL {car_data['url']} already exists, skipping")
-            return
+        # Fetch car detail page
+        car_html = await fetch_page(car_url, client, controller)
         
-        # Create new car record
-        car = Car(**car_data)
-        session.add(car)
-        await session.commit()
-        logger.info(f"Saved car: {car_data['title']} with VIN {car_data.get('car_vin', 'unknown')}")
+        # Parse car data in the parse worker processes
+        car_data = await parse_car_detail_page_in_pool(car_html, car_url)
     except Exception as e:
-        await session.rollback()
-        logger.error(f"Error saving car data: {e}")
+        logger.error(f"Error processing car page {car_url}: {e}")
+        return None, None
+    
+    if car_data.get('phone_number'):
+        return car_data, None
+    
+    # If no phone number was found, it is fetched like the "show phone" button does
+    logger.info(f"Phone number not found on initial load, trying to get phone via API for {car_url}")
+    
+    # Extract advertisement ID from URL first, then from the data-advertisement-id attribute
+    ad_match = AD_ID_PATTERN.search(car_url) or DATA_AD_ID_PATTERN.search(car_html)
+    if not ad_match:
+        logger.warning(f"Could not extract advertisement ID for {car_url}")
+        return car_data, None
+    return car_data, ad_match.group(1)
 
 
-async def process_car_page(car_url: str, client: httpx.AsyncClient, session: AsyncSession) -> None:
+async def fetch_phone_number(ad_id: str, car_url: str, client: httpx.AsyncClient) -> Optional[str]:
     """
-    Process a single car detail page
+    Get a car's phone number from the phone API
+    
+    Args:
+        ad_id: Advertisement ID of the car
+        car_url: URL of the car page, sent as the referer
+        client: HTTP client
+        
+    Returns:
+        Formatted phone number, or None if the API didn't return one
     """
     try:
-        # Fetch car detail page
-        car_html = await fetch_page(car_url, client)
+        # Construct API URL to get phone number
+        phone_api_url = f"https://auto.ria.com/users/phones/{ad_id}"
         
-        # Parse car data
-        car_data = await parse_car_detail_page(car_html, car_url)
+        # Add referer header to mimic clicking from the page
+        headers = client.headers.copy()
+        headers["Referer"] = car_url
+        headers["X-Requested-With"] = "XMLHttpRequest"
         
-        # If no phone number was found, we need to emulate clicking "show phone" button
-        if not car_data.get('phone_number'):
-            logger.info(f"Phone number not found on initial load, trying to get phone via API for {car_url}")
-            
-            try:
-                # Extract advertisement ID from URL or page
-                ad_id = None
-                # Try to get from URL first
-                url_match = re.search(r'auto_[^_]+_(\d+)\.html', car_url)
-                if url_match:
-                    ad_id = url_match.group(1)
-                
-                # If not found in URL, look in the HTML for data-advertisement-id
-                if not ad_id:
-                    soup = BeautifulSoup(car_html, "lxml")
-                    ad_element = soup.select_one('[data-advertisement-id]')
-                    if ad_element:
-                        ad_id = ad_element.get('data-advertisement-id')
-                
-                if ad_id:
-                    # Construct API URL to get phone number
-                    phone_api_url = f"https://auto.ria.com/users/phones/{ad_id}"
-                    
-                    # Add referer header to mimic clicking from the page
-                    headers = client.headers.copy()
-                    headers["Referer"] = car_url
-                    headers["X-Requested-With"] = "XMLHttpRequest"
-                    
-                    # Make API request
-                    response = await client.get(phone_api_url, headers=headers)
-                    if response.status_code == 200:
-                        try:
-                            # Parse response JSON
-                            phone_data = response.json()
-                            
-                            # Extract phone number from response
-                            if "formattedPhoneNumber" in phone_data:
-                                car_data["phone_number"] = format_phone_number(phone_data["formattedPhoneNumber"])
-                                logger.info(f"Successfully retrieved phone number via API: {car_data['phone_number']}")
-                            elif "phones" in phone_data and phone_data["phones"]:
-                                car_data["phone_number"] = format_phone_number(phone_data["phones"][0])
-                                logger.info(f"Successfully retrieved phone number via API: {car_data['phone_number']}")
-                        except Exception as e:
-                            logger.error(f"Error parsing phone API response: {e}")
-                else:
-                    logger.warning(f"Could not extract advertisement ID for {car_url}")
-            except Exception as e:
-                logger.error(f"Error fetching phone number via API: {e}")
-        
-        # Save car data to database
-        await save_car_data(car_data, session)
+        # Make API request
+        response = await client.get(phone_api_url, headers=headers)
+        if response.status_code != 200:
+            return None
         
+        try:
+            # Parse response JSON
+            phone_data = orjson.loads(response.content)
+            
+            # Extract phone number from response
+            phone_number = None
+            if "formattedPhoneNumber" in phone_data:
+                phone_number = format_phone_number(phone_data["formattedPhoneNumber"])
+            elif "phones" in phone_data and phone_data["phones"]:
+                phone_number = format_phone_number(phone_data["phones"][0])
+            if phone_number:
+                logger.info(f"Successfully retrieved phone number via API: {phone_number}")
+            return phone_number
+        except Exception as e:
+            logger.error(f"Error parsing phone API response: {e}")
     except Exception as e:
-        logger.error(f"Error processing car page {car_url}: {e}")
+        logger.error(f"Error fetching phone number via API: {e}")
+    return None
 
 
-async def process_listing_page(page_url: str, client: httpx.AsyncClient, session: AsyncSession) -> str:
+async def process_listing_page(
+    page_url: str,
+    car_urls: List[str],
+    client: httpx.AsyncClient,
+    session: AsyncSession,
+    controller: AIMDController,
+    db_lock: Optional[asyncio.Lock] = None,
+    known_urls: Optional[Set[str]] = None
+) -> None:
     """
-    Process a listing page and get the next page URL
+    Scrape the cars of a listing page and store them
+    
+    Args:
+        page_url: URL of the listing page
+        car_urls: Car URLs found on the page
+        client: HTTP client
+        session: Database session
+        controller: Limits concurrent requests across all pages
+        db_lock: Serializes use of the session when pages are processed concurrently
+        known_urls: URLs already stored or being scraped, skipped and extended in place
     """
     try:
-        # Fetch the listing page
-        html = await fetch_page(page_url, client)
-        
-        # Parse listing page and get all car URLs
-        car_urls = await parse_car_listing_page(html)
-        
-        if not car_urls:
-            logger.warning(f"No car URLs found on page {page_url}")
-            
-            # Check if there's a next page even if no cars found (might be temporary error)
-            next_page_url = await get_next_page_url(html, page_url)
-            if next_page_url:
-                logger.info(f"No cars found but next page exists: {next_page_url}")
-                return next_page_url
-                
-            return None
-            
         logger.info(f"Found {len(car_urls)} car URLs on page {page_url}")
         
-        # Process each car URL with a limited number of concurrent tasks
-        semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+        # Skip cars that are already stored or taken by another page
+        if known_urls is not None:
+            car_urls = [url for url in car_urls if url not in known_urls]
+            known_urls.update(car_urls)
+            logger.info(f"{len(car_urls)} of them are new")
+        
+        async def fetch_with_limit(url):
+            async with controller:
+                return await fetch_car_data(url, client, controller)
         
-        async def process_with_semaphore(url):
-            async with semaphore:
-                await process_car_page(url, client, session)
+        async def fetch_phone_with_limit(car_data, ad_id):
+            async with controller:
+                phone_number = await fetch_phone_number(ad_id, car_data["url"], client)
+            if phone_number:
+                car_data["phone_number"] = phone_number
         
         # Process only a limited number of links in test mode
         if settings.TEST_MODE:
@@ -228,20 +446,24 @@ async def process_listing_page(page_url: str, client: httpx.AsyncClient, session
             car_urls = car_urls[:test_limit]
         
         # Create tasks for each car URL
-        tasks = [process_with_semaphore(url) for url in car_urls]
-        await asyncio.gather(*tasks)
+        tasks = [fetch_with_limit(url) for url in car_urls]
+        results = await asyncio.gather(*tasks)
         
-        # Get the URL for the next page
-        next_page_url = await get_next_page_url(html, page_url)
-        if next_page_url:
-            logger.info(f"Next page URL: {next_page_url}")
-        else:
-            logger.info("No next page found")
+        # Fetch the missing phone numbers of the page together
+        await asyncio.gather(*(
+            fetch_phone_with_limit(car_data, ad_id)
+            for car_data, ad_id in results
+            if car_data and ad_id
+        ))
+        cars = [car_data for car_data, _ in results]
         
-        return next_page_url
+        # Store the page's cars with one COPY, URLs already stored are skipped
+        rows = [car_data for car_data in cars if car_data]
+        async with db_lock or nullcontext():
+            inserted = await copy_cars(session, rows)
+        logger.info(f"Saved {inserted} new cars of {len(rows)} scraped on page {page_url}")
     except Exception as e:
         logger.error(f"Error processing listing page {page_url}: {e}")
-        return None
 
 
 async def run_scraper(db_session: AsyncSession) -> None:
@@ -260,7 +482,6 @@ async def run_scraper(db_session: AsyncSession) -> None:
         "Accept-Language": "uk-UA,uk;q=0.9,en-US;q=0.8,en;q=0.7",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
         "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive",
         "Cache-Control": "max-age=0",
         "Sec-Fetch-Dest": "document",
         "Sec-Fetch-Mode": "navigate",
@@ -272,15 +493,25 @@ async def run_scraper(db_session: AsyncSession) -> None:
         "Referer": "https://auto.ria.com/uk/"
     }
     
-    limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    # One adaptive limit for every request of the run, the next listing is fetched under it too
+    controller = AIMDController(settings.MAX_CONCURRENT_REQUESTS, settings.MAX_ADAPTIVE_CONCURRENCY)
+    limits = httpx.Limits(
+        max_keepalive_connections=controller.max_limit,
+        max_connections=controller.max_limit
+    )
+    
+    # URLs already in the database are neither fetched nor inserted again
+    known_urls: Set[str] = set((await db_session.scalars(select(Car.url))).all())
+    logger.info(f"Loaded {len(known_urls)} known car URLs")
     
     # Create debug directory
     debug_dir = "debug"
     os.makedirs(debug_dir, exist_ok=True)
     
-    # Create client with limits and timeout
+    # Create client with limits and timeout, over HTTP/2 detail pages share one connection
     timeout = httpx.Timeout(30.0, connect=10.0)
     async with httpx.AsyncClient(
+        http2=True,
         headers=headers, 
         follow_redirects=True, 
         timeout=timeout,
@@ -295,21 +526,88 @@ async def run_scraper(db_session: AsyncSession) -> None:
         
         logger.info(f"Starting scraping with max pages: {max_pages}")
         
+        async def fetch_with_limit(url):
+            async with controller:
+                return await fetch_page(url, client, controller)
+        
+        async def scrape_numbered_pages(first_url: str, first_car_urls: List[str]) -> int:
+            """Scrape the first page's cars and every further numbered page concurrently"""
+            page_urls = [first_url]
+            while len(page_urls) < max_pages:
+                page_urls.append(build_next_page_url(page_urls[-1]))
+            # Pages after the first one without cars are past the end and skipped
+            last_page = len(page_urls)
+            db_lock = asyncio.Lock()
+            
+            async def scrape_page(page_number: int, page_url: str) -> None:
+                nonlocal last_page
+                if page_number == 1:
+                    car_urls = first_car_urls
+                else:
+                    if page_number > last_page:
+                        return
+                    try:
+                        html = await fetch_with_limit(page_url)
+                        car_urls = (await parse_listing_page_in_pool(html, page_url))[0] if html else []
+                    except Exception as e:
+                        logger.error(f"Error processing listing page {page_url}: {e}")
+                        return
+                    if not car_urls:
+                        logger.info(f"No car URLs found on page {page_number}, it is past the last page")
+                        last_page = min(last_page, page_number - 1)
+                        return
+                    if page_number > last_page:
+                        return
+                await process_listing_page(page_url, car_urls, client, db_session, controller, db_lock, known_urls)
+            
+            await asyncio.gather(*(
+                scrape_page(page_number, page_url)
+                for page_number, page_url in enumerate(page_urls, start=1)
+            ))
+            return last_page
+        
+        # Listing page fetched ahead while the previous page's cars were scraped
+        html_task: Optional[asyncio.Task] = None
+        
         while current_page_url and page_count < max_pages:
             logger.info(f"Processing page {page_count + 1}: {current_page_url}")
             
-            # Process the current page and get the next page URL
-            next_page_url = await process_listing_page(current_page_url, client, db_session)
+            try:
+                html = await (html_task or fetch_with_limit(current_page_url))
+                html_task = None
+                if not html:
+                    logger.error(f"Failed to fetch page {current_page_url}")
+                    break
+                car_urls, next_page_url = await parse_listing_page_in_pool(html, current_page_url)
+            except Exception as e:
+                logger.error(f"Error processing listing page {current_page_url}: {e}")
+                break
+            
+            # Fetch the next listing while this page's cars are scraped
+            has_next_page = next_page_url is not None and page_count + 1 < max_pages
             
-            if not next_page_url or next_page_url == current_page_url:
+            # When pages are only numbered, all their URLs are known and they are scraped at once
+            if has_next_page and page_count == 0 and next_page_url == build_next_page_url(current_page_url):
+                logger.info(f"Scraping up to {max_pages} numbered pages concurrently")
+                page_count = await scrape_numbered_pages(current_page_url, car_urls)
+                break
+            
+            if has_next_page:
+                logger.info(f"Next page URL: {next_page_url}")
+                html_task = asyncio.create_task(fetch_with_limit(next_page_url))
+            
+            if car_urls:
+                await process_listing_page(current_page_url, car_urls, client, db_session, controller, known_urls=known_urls)
+            else:
+                # Might be a temporary error, go on if there is a next page
+                logger.warning(f"No car URLs found on page {current_page_url}")
+            
+            if not has_next_page:
                 logger.info("No more pages to process")
                 break
             
             current_page_url = next_page_url
             page_count += 1
-            
-            # Small delay between pages to avoid rate limiting
-            await asyncio.sleep(settings.REQUEST_DELAY * 2)
     
     elapsed_time = time.time() - start_time
     logger.info(f"Scraping completed. Processed {page_count} pages in {elapsed_time:.2f} seconds") 
\ No newline at end of file
@@ -0,0 +1,233 @@
+// Anti-detection scripts registered as a context init script by enhanced_playwright_scraper
+
+// Apply basic stealth settings
+(() => {
+    // Overwrite the 'navigator.webdriver' property
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+    
+    // Add chrome object
+    window.chrome = {
+        app: {
+            isInstalled: false,
+        },
+        webstore: {
+            onInstallStageChanged: {},
+            onDownloadProgress: {},
+        },
+        runtime: {
+            PlatformOs: {
+                MAC: 'mac',
+                WIN: 'win',
+                ANDROID: 'android',
+                CROS: 'cros',
+                LINUX: 'linux',
+                OPENBSD: 'openbsd',
+            },
+            PlatformArch: {
+                ARM: 'arm',
+                X86_32: 'x86-32',
+                X86_64: 'x86-64',
+            },
+            PlatformNaclArch: {
+                ARM: 'arm',
+                X86_32: 'x86-32',
+                X86_64: 'x86-64',
+            },
+            RequestUpdateCheckStatus: {
+                THROTTLED: 'throttled',
+                NO_UPDATE: 'no_update',
+                UPDATE_AVAILABLE: 'update_available',
+            },
+            OnInstalledReason: {
+                INSTALL: 'install',
+                UPDATE: 'update',
+                CHROME_UPDATE: 'chrome_update',
+                SHARED_MODULE_UPDATE: 'shared_module_update',
+            },
+            OnRestartRequiredReason: {
+                APP_UPDATE: 'app_update',
+                OS_UPDATE: 'os_update',
+                PERIODIC: 'periodic',
+            }
+        }
+    };
+})();
+
+// Spoof languages
+(() => {
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['uk-UA', 'uk', 'en-US', 'en'],
+    });
+})();
+
+// Add sophisticated WebGL fingerprinting protection
+(() => {
+    // WebGL vendor and renderer spoofing
+    const getParameter = WebGLRenderingContext.prototype.getParameter;
+    WebGLRenderingContext.prototype.getParameter = function(parameter) {
+        // UNMASKED_RENDERER_WEBGL
+        if (parameter === 37446) {
+            return 'Intel(R) HD Graphics 630';
+        }
+        // UNMASKED_VENDOR_WEBGL
+        if (parameter === 37445) {
+            return 'Intel Inc.';
+        }
+        
+        // Add noise to some parameters
+        if (parameter === 3415) return 0;
+        if (parameter === 3414) return 24;
+        if (parameter === 35661) return 32;
+        if (parameter === 34047) return 16;
+        if (parameter === 34930) return 16;
+        if (parameter === 3379) return 16384;
+        if (parameter === 36349) return 1024;
+        if (parameter === 34076) return 16384;
+        if (parameter === 36348) return 30;
+        if (parameter === 34024) return 16384;
+        if (parameter === 3386) return 16384;
+        if (parameter === 3413) return 16;
+        if (parameter === 3412) return 16;
+        if (parameter === 3410) return 8;
+        if (parameter === 3411) return 8;
+        if (parameter === 34852) return 8;
+        if (parameter === 34068) return 32;
+        
+        return getParameter.apply(this, arguments);
+    };
+})();
+
+// Plugin spoofing with realistic data
+(() => {
+    // Add plugins to spoof plugin count
+    const mockPlugins = [
+        {
+            name: 'Chrome PDF Plugin',
+            description: 'Portable Document Format',
+            filename: 'internal-pdf-viewer',
+            mimeTypes: [
+                { type: 'application/x-google-chrome-pdf', suffixes: 'pdf', description: 'Portable Document Format' }
+            ]
+        },
+        {
+            name: 'Chrome PDF Viewer',
+            description: 'Portable Document Format',
+            filename: 'internal-pdf-viewer',
+            mimeTypes: [
+                { type: 'application/pdf', suffices: 'pdf', description: 'Portable Document Format' }
+            ]
+        },
+        {
+            name: 'Native Client',
+            description: '',
+            filename: 'internal-nacl-plugin',
+            mimeTypes: [
+                { type: 'application/x-nacl', suffices: '', description: 'Native Client Executable' },
+                { type: 'application/x-pnacl', suffices: '', description: 'Portable Native Client Executable' }
+            ]
+        }
+    ];
+    
+    // Define navigator.plugins
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => {
+            // Create plugin array with correct prototype
+            const pluginArray = Object.create(PluginArray.prototype);
+            
+            // Add length property
+            Object.defineProperty(pluginArray, 'length', {
+                get: () => mockPlugins.length,
+            });
+            
+            // Add each plugin
+            mockPlugins.forEach((plugin, i) => {
+                // Create the plugin
+                const pluginObj = Object.create(Plugin.prototype);
+                
+                // Define plugin properties
+                Object.defineProperty(pluginObj, 'name', { get: () => plugin.name });
+                Object.defineProperty(pluginObj, 'description', { get: () => plugin.description });
+                Object.defineProperty(pluginObj, 'filename', { get: () => plugin.filename });
+                
+                // Create mimeTypes collection
+                const mimeTypes = Object.create(MimeTypeArray.prototype);
+                Object.defineProperty(mimeTypes, 'length', { get: () => plugin.mimeTypes.length });
+                
+                // Add each mime type
+                plugin.mimeTypes.forEach((mimeType, j) => {
+                    // Create the mimeType
+                    const mimeTypeObj = Object.create(MimeType.prototype);
+                    
+                    // Define mimeType properties
+                    Object.defineProperty(mimeTypeObj, 'type', { get: () => mimeType.type });
+                    Object.defineProperty(mimeTypeObj, 'suffices', { get: () => mimeType.suffices });
+                    Object.defineProperty(mimeTypeObj, 'description', { get: () => mimeType.description });
+                    Object.defineProperty(mimeTypeObj, 'enabledPlugin', { get: () => pluginObj });
+                    
+                    // Add the mimeType to mimeTypes
+                    Object.defineProperty(mimeTypes, j, { get: () => mimeTypeObj });
+                    Object.defineProperty(mimeTypes, mimeType.type, { get: () => mimeTypeObj });
+                });
+                
+                // Add mimeTypes to plugin
+                Object.defineProperty(pluginObj, 'length', { get: () => plugin.mimeTypes.length });
+                plugin.mimeTypes.forEach((mimeType, j) => {
+                    Object.defineProperty(pluginObj, j, { get: () => mimeTypes[j] });
+                });
+                
+                // Add the plugin to pluginArray
+                Object.defineProperty(pluginArray, i, { get: () => pluginObj });
+                Object.defineProperty(pluginArray, plugin.name, { get: () => pluginObj });
+            });
+            
+            // Add item method
+            pluginArray.item = function(index) {
+                return this[index];
+            };
+            
+            // Add namedItem method
+            pluginArray.namedItem = function(name) {
+                return this[name];
+            };
+            
+            // Add refresh method
+            pluginArray.refresh = function() {};
+            
+            return pluginArray;
+        }
+    });
+})();
+
+// Permissions API spoofing
+(() => {
+    // Permissions spoofing
+    if (navigator.permissions) {
+        const originalQuery = navigator.permissions.query;
+        navigator.permissions.query = function(parameters) {
+            if (parameters.name === 'notifications') {
+                return Promise.resolve({ state: Notification.permission, onchange: null });
+            }
+            return originalQuery.call(this, parameters);
+        };
+    }
+    
+    // Add userActivation (Chrome-specific)
+    Object.defineProperty(navigator, 'userActivation', {
+        get: () => {
+            return {
+                hasBeenActive: true,
+                isActive: true
+            };
+        }
+    });
+})();
+
+// Handle window.open to prevent popup usage for detection
+(() => {
+    window.open = function(url, target, features) {
+        console.log('Window open called: ', url, target, features);
+        return null;
+    };
+})();
@@ -19,5 +19,6 @@ if __name__ == "__main__":
         "app.main:app", 
         host="0.0.0.0", 
         port=8000, 
+        loop="auto",  # Picks uvloop when it is installed (not available on Windows)
         reload=True
     ) 
\ No newline at end of file
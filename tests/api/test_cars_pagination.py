@@ -0,0 +1,25 @@
+"""
+Tests for the keyset pagination cursor used by GET /api/cars.
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    """A cursor decodes back to the sort key it was built from"""
+    found = datetime(2024, 5, 17, 13, 45, 12, 123456)
+    cursor = encode_cursor(found, 42)
+    
+    assert decode_cursor(cursor) == (found, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    """Garbage cursors produce a 400 instead of a server error"""
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,41 @@
+"""
+Tests for the on-disk response cache of the HTTP scraper.
+"""
+import asyncio
+import time
+
+from app.scraper.scraper import ResponseCache
+
+CAR_URL = "https://auto.ria.com/uk/auto_bmw_x5_36871296.html"
+LISTING_URL = "https://auto.ria.com/uk/car/used/?page=2"
+
+
+def test_response_cache_round_trip(tmp_path):
+    """A stored page comes back with its validators"""
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    
+    async def round_trip():
+        await cache.put(CAR_URL, "<html>Цiна</html>", '"abc"', "Wed, 21 Oct 2015 07:28:00 GMT")
+        return await cache.get(CAR_URL)
+    
+    entry = asyncio.run(round_trip())
+    
+    assert entry["body"] == "<html>Цiна</html>"
+    assert entry["etag"] == '"abc"'
+    assert entry["last_modified"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+def test_response_cache_miss(tmp_path):
+    """Pages that were never stored are not found"""
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    
+    assert asyncio.run(cache.get(CAR_URL)) is None
+
+
+def test_only_recent_car_pages_are_fresh(tmp_path):
+    """Car pages are fresh within the TTL, listing pages never are"""
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    
+    assert cache.is_fresh(CAR_URL, {"fetched_at": time.time()})
+    assert not cache.is_fresh(CAR_URL, {"fetched_at": time.time() - 3601})
+    assert not cache.is_fresh(LISTING_URL, {"fetched_at": time.time()})
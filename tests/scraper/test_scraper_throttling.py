@@ -0,0 +1,72 @@
+"""
+Tests for the adaptive request throttling of the HTTP scraper.
+"""
+import asyncio
+import time
+from email.utils import formatdate
+
+from app.scraper.scraper import CONCURRENCY_INCREASE, AIMDController, parse_retry_after
+
+
+def test_retry_after_in_seconds():
+    """A plain number is taken as seconds"""
+    assert parse_retry_after("120") == 120.0
+
+
+def test_retry_after_as_http_date():
+    """An HTTP date is turned into the seconds left until then"""
+    delay = parse_retry_after(formatdate(time.time() + 60, usegmt=True))
+    
+    assert 55 <= delay <= 60
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+
+
+def test_invalid_retry_after_is_ignored():
+    """Missing or garbage headers give no delay"""
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+
+
+def test_limit_grows_up_to_max():
+    """Healthy responses raise the limit, but never past max_limit"""
+    controller = AIMDController(1, 3)
+    
+    async def respond(times):
+        for _ in range(times):
+            await controller.on_success(0.1)
+    
+    asyncio.run(respond(2))
+    assert controller.limit == 1 + 2 * CONCURRENCY_INCREASE
+    
+    asyncio.run(respond(10))
+    assert controller.limit == 3
+
+
+def test_throttle_halves_limit_and_pauses():
+    """A throttle halves the limit and holds new requests for the Retry-After period"""
+    controller = AIMDController(4, 8)
+    
+    controller.on_throttle("30")
+    
+    assert controller.limit == 2
+    assert 25 < controller._resume_at - time.monotonic() <= 30
+    
+    controller.on_throttle("30")
+    controller.on_throttle("30")
+    assert controller.limit == controller.min_limit
+
+
+def test_slow_response_does_not_raise_limit():
+    """A response much slower than the recent average leaves the limit alone"""
+    controller = AIMDController(2, 8)
+    
+    async def respond():
+        await controller.on_success(0.1)
+        limit = controller.limit
+        await controller.on_success(1.0)
+        return limit
+    
+    limit_before_slow = asyncio.run(respond())
+    
+    assert controller.limit == limit_before_slow